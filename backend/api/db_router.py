@@ -0,0 +1,106 @@
+from contextvars import ContextVar
+
+from rest_framework.permissions import SAFE_METHODS
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA_DB = "replica"
+# Токены и сессии читаются сразу после создания, задержка реплики
+# для них недопустима. Таблица кеша (django_cache) есть только
+# в основной базе.
+PRIMARY_ONLY_MODELS = {
+    "authtoken.token",
+    "sessions.session",
+    "django_cache.cacheentry",
+}
+PIN_KEY = "replica_pin:{}"
+
+current_request = ContextVar("replica_request", default=None)
+
+
+def replica_enabled():
+    return REPLICA_DB in settings.DATABASES
+
+
+def primary_only(model):
+    # У модели записи кеша базы данных нет label_lower.
+    label = f"{model._meta.app_label}.{model._meta.model_name}"
+    return label in PRIMARY_ONLY_MODELS
+
+
+class RequestState:
+    """Состояние маршрутизации запроса: были ли в нём изменения и
+    закреплён ли пользователь за основной базой."""
+
+    def __init__(self, request):
+        self.request = request
+        self.wrote = False
+        self.pinned = None
+
+    def reads_primary(self):
+        if self.wrote or self.request.method not in SAFE_METHODS:
+            return True
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return True
+        if self.pinned is None:
+            # Пока проверяется закрепление, сессия и пользователь
+            # читаются из основной базы.
+            self.pinned = True
+            self.pinned = is_pinned(getattr(self.request, "user", None))
+        return self.pinned
+
+
+def is_pinned(user):
+    if user is None or not user.is_authenticated:
+        return False
+    return bool(cache.get(PIN_KEY.format(user.pk)))
+
+
+def pin_to_primary(user):
+    """После изменений пользователь на REPLICA_PIN_SECONDS читает из
+    основной базы и видит свои записи, даже если реплика отстаёт."""
+    if user is not None and user.is_authenticated:
+        cache.set(PIN_KEY.format(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+
+class ReplicaRouter:
+    """Чтения безопасных запросов (GET, HEAD, OPTIONS) направляет в базу
+    replica, всё остальное — в default. Вне запросов (команды, воркер)
+    и без настроенной реплики работает только default."""
+
+    def __init__(self):
+        self.enabled = replica_enabled()
+
+    def db_for_read(self, model, **hints):
+        if not self.enabled:
+            return None
+        state = current_request.get()
+        if (
+            state is None
+            or primary_only(model)
+            or state.reads_primary()
+        ):
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB
+
+    def db_for_write(self, model, **hints):
+        if not self.enabled:
+            return None
+        state = current_request.get()
+        if state is not None and not primary_only(model):
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, REPLICA_DB}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == REPLICA_DB:
+            return False
+        return None
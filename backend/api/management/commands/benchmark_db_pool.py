@@ -0,0 +1,117 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+from foodgram_backend.db_pool.pool import pool_stats
+
+
+def engines(engine):
+    """Обычный движок и движок с пулом для ENGINE из настроек."""
+    vendor = engine.rsplit(".", 1)[1]
+    return f"django.db.backends.{vendor}", f"foodgram_backend.db_pool.{vendor}"
+
+
+def percentile(values, share):
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares opening a database connection per request with taking "
+        "it from the connection pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--max-size", type=int)
+        parser.add_argument("--timeout", type=float)
+        parser.add_argument("--query", default="SELECT 1")
+
+    def handle(self, *args, **options):
+        settings_dict = connections[options["database"]].settings_dict
+        if settings_dict["NAME"] in ("", ":memory:"):
+            raise CommandError("An in-memory database cannot be shared")
+        pool_options = dict(settings_dict.get("POOL", {}))
+        if options["max_size"] is not None:
+            pool_options["MAX_SIZE"] = options["max_size"]
+        if options["timeout"] is not None:
+            pool_options["TIMEOUT"] = options["timeout"]
+        connect_engine, pooled_engine = engines(settings_dict["ENGINE"])
+        modes = {"connect": connect_engine, "pooled": pooled_engine}
+        self.stdout.write(
+            f"{'mode':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'connects':>10}{'wait ms':>10}{'timeouts':>10}"
+        )
+        for mode, engine in modes.items():
+            alias = f"benchmark_{mode}"
+            wrapper_settings = {
+                **settings_dict,
+                "ENGINE": engine,
+                "CONN_MAX_AGE": 0,
+                "POOL": pool_options,
+            }
+            try:
+                backend = load_backend(engine)
+            except Exception as error:
+                raise CommandError(f"{engine}: {error}")
+            latencies, elapsed, errors = self.run(
+                backend, wrapper_settings, alias, options
+            )
+            self.report(mode, latencies, elapsed, errors, alias)
+
+    def run(self, backend, settings_dict, alias, options):
+        """Как запросы Django: поток берёт соединение, выполняет запрос
+        и закрывает соединение в конце запроса."""
+        local = threading.local()
+        errors = []
+
+        def request(_):
+            if not hasattr(local, "wrapper"):
+                local.wrapper = backend.DatabaseWrapper(settings_dict, alias)
+            wrapper = local.wrapper
+            started = time.perf_counter()
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute(options["query"])
+                    cursor.fetchall()
+            except Exception as error:
+                errors.append(error)
+                return None
+            finally:
+                wrapper.close()
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["threads"]) as executor:
+            results = list(executor.map(request, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+        latencies = sorted(result for result in results if result is not None)
+        return latencies, elapsed, errors
+
+    def report(self, mode, latencies, elapsed, errors, alias):
+        if not latencies:
+            raise CommandError(f"{mode}: all requests failed: {errors[0]}")
+        stats = {"connects": len(latencies), "wait_ms_avg": 0, "timeouts": 0}
+        if mode == "pooled":
+            stats = pool_stats()[alias]
+        self.stdout.write(
+            f"{mode:<10}{len(latencies) / elapsed:>10.0f}"
+            f"{statistics.median(latencies):>10.2f}"
+            f"{percentile(latencies, 0.95):>10.2f}"
+            f"{percentile(latencies, 0.99):>10.2f}"
+            f"{stats['connects']:>10}{stats['wait_ms_avg']:>10.3f}"
+            f"{stats['timeouts']:>10}"
+        )
+        if errors:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{mode}: {len(errors)} errors, first: {errors[0]}"
+                )
+            )
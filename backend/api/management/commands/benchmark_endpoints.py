@@ -0,0 +1,272 @@
+import json
+import statistics
+import time
+from contextlib import contextmanager
+from io import StringIO
+from pathlib import Path
+
+from rest_framework.test import APIClient
+
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection
+from django.db.backends.utils import CursorDebugWrapper
+from django.test.runner import DiscoverRunner
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from recipes.cache import bump_generation
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.user_lists import remove_recipe
+from user.models import User
+
+
+BUDGETS_PATH = Path(__file__).resolve().parents[2] / "benchmark_budgets.json"
+PAGE_SIZES = (5, 50)
+LATENCY_HEADROOM = 4
+
+
+class RowCountingCursor(CursorDebugWrapper):
+    """Курсор, считающий полученные из базы строки."""
+
+    def __init__(self, cursor, db, stats):
+        super().__init__(cursor, db)
+        self.stats = stats
+
+    def fetchone(self):
+        with self.db.wrap_database_errors:
+            row = self.cursor.fetchone()
+        self.stats["rows"] += row is not None
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        with self.db.wrap_database_errors:
+            rows = self.cursor.fetchmany(*args, **kwargs)
+        self.stats["rows"] += len(rows)
+        return rows
+
+    def fetchall(self):
+        with self.db.wrap_database_errors:
+            rows = self.cursor.fetchall()
+        self.stats["rows"] += len(rows)
+        return rows
+
+
+@contextmanager
+def measure():
+    """Число запросов, полученных строк и время выполнения блока."""
+    stats = {"queries": 0, "rows": 0, "ms": 0.0}
+    connection.make_debug_cursor = lambda cursor: RowCountingCursor(
+        cursor, connection, stats
+    )
+    started = time.perf_counter()
+    try:
+        with CaptureQueriesContext(connection) as captured:
+            yield stats
+    finally:
+        stats["ms"] = (time.perf_counter() - started) * 1000
+        del connection.make_debug_cursor
+    stats["queries"] = len(captured)
+
+
+def consume(response):
+    if response.streaming:
+        b"".join(response.streaming_content)
+    return response
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the hot API endpoints against a seeded test database and "
+        "checks query, row and latency budgets"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--recipes-per-user", type=int, default=5)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--budgets", default=str(BUDGETS_PATH))
+        parser.add_argument(
+            "--update-budgets",
+            action="store_true",
+            help="Write the measured values as the new budgets",
+        )
+        parser.add_argument(
+            "--advisory-latency",
+            action="store_true",
+            help="Report latency over budget without failing (for CI)",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database between runs",
+        )
+
+    def get_scenarios(self):
+        user = User.objects.filter(shopping_user__isnull=False).first()
+        client = APIClient()
+        client.force_authenticate(user)
+        anonymous = APIClient()
+        recipe = Recipe.objects.exclude(author=user).first()
+        slugs = Tag.objects.values_list("slug", flat=True)[:2]
+        tags = "&".join(f"tags={slug}" for slug in slugs)
+        prefix = Ingredient.objects.values_list("name", flat=True).first()[:2]
+
+        def toggle(name):
+            url = f"/api/recipes/{recipe.id}/{name}/"
+
+            def run():
+                response = client.post(url)
+                if response.status_code != 201:
+                    return response
+                return client.delete(url)
+
+            return run
+
+        def reset(model):
+            return lambda: remove_recipe(model, user.id, recipe.id)
+
+        scenarios = {
+            "recipe_list": lambda: client.get("/api/recipes/"),
+            "recipe_list_anonymous": lambda: anonymous.get(
+                f"/api/recipes/?page=2&{tags}"
+            ),
+            "recipe_list_filtered": lambda: client.get(
+                f"/api/recipes/?{tags}&author={recipe.author_id}"
+                "&is_favorited=0"
+            ),
+            "recipe_list_cursor": lambda: client.get(
+                "/api/recipes/?cursor=&limit=20"
+            ),
+            "recipe_search": lambda: client.get(
+                "/api/recipes/?search=суп"
+            ),
+            "recipe_detail": lambda: client.get(f"/api/recipes/{recipe.id}/"),
+            "subscriptions": lambda: client.get(
+                "/api/users/subscriptions/?recipes_limit=3"
+            ),
+            "download_shopping_cart": lambda: client.get(
+                "/api/recipes/download_shopping_cart/"
+            ),
+            "ingredient_search": lambda: client.get(
+                f"/api/ingredients/?name={prefix}"
+            ),
+            "favorite_toggle": toggle("favorite"),
+            "shopping_cart_toggle": toggle("shopping_cart"),
+        }
+        # Подготовка перед каждым замером, в замер не входит: список для
+        # анонимов измеряется с промахом кеша, переключатели начинают
+        # с рецепта, которого нет в списке, чтобы и POST, и DELETE были
+        # успешными.
+        setups = {
+            "recipe_list_anonymous": lambda: bump_generation("recipes"),
+            "favorite_toggle": reset(Favorite),
+            "shopping_cart_toggle": reset(ShoppingCart),
+        }
+        return scenarios, setups, client
+
+    def run_scenario(self, scenario, setup, repeat):
+        setup()
+        consume(scenario())
+        results = []
+        for _ in range(repeat):
+            setup()
+            with measure() as stats:
+                response = consume(scenario())
+            if response.status_code >= 400:
+                raise CommandError(
+                    f"Unexpected status {response.status_code}"
+                )
+            results.append(stats)
+        return {
+            "queries": max(result["queries"] for result in results),
+            "rows": max(result["rows"] for result in results),
+            "ms": round(statistics.median(r["ms"] for r in results), 1),
+        }
+
+    def check_page_size(self, client):
+        """Число запросов списка рецептов не зависит от размера страницы."""
+        queries = {}
+        for limit in PAGE_SIZES:
+            with measure() as stats:
+                client.get(f"/api/recipes/?limit={limit}")
+            queries[limit] = stats["queries"]
+        if len(set(queries.values())) != 1:
+            return [f"recipe_list queries depend on page size: {queries}"]
+        return []
+
+    def benchmark(self, options):
+        call_command(
+            "seed_synthetic",
+            users=options["users"],
+            recipes_per_user=options["recipes_per_user"],
+            stdout=StringIO(),
+        )
+        scenarios, setups, client = self.get_scenarios()
+        measured = {}
+        for name, scenario in scenarios.items():
+            measured[name] = self.run_scenario(
+                scenario, setups.get(name, lambda: None), options["repeat"]
+            )
+        return measured, self.check_page_size(client)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, keepdb=options["keepdb"])
+        old_config = runner.setup_databases()
+        try:
+            measured, failures = self.benchmark(options)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        budgets_path = Path(options["budgets"])
+        if options["update_budgets"]:
+            budgets = {
+                name: {
+                    "queries": stats["queries"],
+                    "rows": stats["rows"],
+                    "ms": max(round(stats["ms"] * LATENCY_HEADROOM), 50),
+                }
+                for name, stats in measured.items()
+            }
+            budgets_path.write_text(
+                json.dumps(budgets, indent=4, sort_keys=True) + "\n"
+            )
+            self.stdout.write(f"Budgets written to {budgets_path}")
+            return
+        budgets = json.loads(budgets_path.read_text())
+
+        warnings = []
+        self.stdout.write(
+            f"{'endpoint':<26}{'queries':>10}{'rows':>10}{'ms':>10}"
+        )
+        for name, stats in measured.items():
+            budget = budgets.get(name, {})
+            marks = {}
+            for metric, value in stats.items():
+                limit = budget.get(metric)
+                over = limit is not None and value > limit
+                marks[metric] = f"{value}{'!' if over else ''}"
+                if not over:
+                    continue
+                failure = f"{name}: {metric} {value} > {limit}"
+                if metric == "ms" and options["advisory_latency"]:
+                    warnings.append(failure)
+                else:
+                    failures.append(failure)
+            self.stdout.write(
+                f"{name:<26}{marks['queries']:>10}{marks['rows']:>10}"
+                f"{marks['ms']:>10}"
+            )
+        if warnings:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Latency over budget:\n" + "\n".join(warnings)
+                )
+            )
+        if failures:
+            raise CommandError("Budgets exceeded:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("Бюджеты эндпоинтов соблюдены"))
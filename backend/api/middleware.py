@@ -0,0 +1,191 @@
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from api.db_router import (
+    RequestState,
+    current_request,
+    pin_to_primary,
+    replica_enabled,
+)
+
+
+logger = logging.getLogger("api.sql")
+
+
+class QueryStats:
+    """Обёртка выполнения SQL: считает запросы, их суммарное время и
+    повторы одного и того же текста запроса. pool_wait — ожидание
+    соединений из пула, None без пула."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.pool_wait = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def repeated(self, threshold):
+        return [
+            {"sql": sql, "count": count}
+            for sql, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+class SQLInstrumentationMiddleware:
+    """Считает SQL-запросы каждого запроса, отдаёт их в заголовке
+    Server-Timing и пишет медленные запросы в журнал api.sql.
+    Запросы, выполненные при отдаче потокового ответа, не учитываются.
+    Поддерживает и ASGI, чтобы не переводить асинхронные представления
+    в поток.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = settings.SQL_INSTRUMENTATION_SLOW_MS
+        self.sample_rate = settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+        self.repeat_threshold = settings.SQL_INSTRUMENTATION_REPEAT_THRESHOLD
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = QueryStats()
+        started = time.perf_counter()
+        with self.instrument(stats):
+            response = self.get_response(request)
+        return self.finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        started = time.perf_counter()
+        # Соединения с базой у каждого потока свои: обёртки ставятся в
+        # потоке, где sync_to_async выполняет запросы этого запроса.
+        instrumented = await sync_to_async(self.instrument)(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(instrumented.close)()
+        return self.finish(request, response, stats, started)
+
+    def instrument(self, stats):
+        stack = ExitStack()
+        for connection in connections.all():
+            if hasattr(connection, "pool_wait"):
+                connection.pool_wait = 0.0
+            stack.enter_context(connection.execute_wrapper(stats))
+        stack.callback(self.collect_pool_wait, stats)
+        return stack
+
+    def collect_pool_wait(self, stats):
+        waits = [
+            connection.pool_wait
+            for connection in connections.all()
+            if hasattr(connection, "pool_wait")
+        ]
+        if waits:
+            stats.pool_wait = sum(waits)
+
+    def finish(self, request, response, stats, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = stats.duration * 1000
+        response["Server-Timing"] = (
+            f'db;dur={db_ms:.1f};desc="{stats.count} queries", '
+            f"total;dur={total_ms:.1f}"
+        )
+        if stats.pool_wait is not None:
+            response["Server-Timing"] += (
+                f", dbpool;dur={stats.pool_wait * 1000:.1f}"
+            )
+        if total_ms >= self.slow_ms and random.random() < self.sample_rate:
+            self.log(request, response, stats, db_ms, total_ms)
+        return response
+
+    def log(self, request, response, stats, db_ms, total_ms):
+        match = request.resolver_match
+        logger.warning(
+            json.dumps(
+                {
+                    "view": match.view_name if match else None,
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "queries": stats.count,
+                    "db_ms": round(db_ms, 1),
+                    "pool_wait_ms": (
+                        None
+                        if stats.pool_wait is None
+                        else round(stats.pool_wait * 1000, 1)
+                    ),
+                    "total_ms": round(total_ms, 1),
+                    "repeated": stats.repeated(self.repeat_threshold),
+                },
+                ensure_ascii=False,
+            )
+        )
+
+
+class ReplicaRoutingMiddleware:
+    """Передаёт ReplicaRouter текущий запрос. Если в запросе были
+    изменения, пользователь закрепляется за основной базой."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RequestState(request)
+        token = current_request.set(state)
+        try:
+            response = self.get_response(request)
+            if state.wrote:
+                pin_to_primary(request.user)
+        finally:
+            current_request.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        state = RequestState(request)
+        token = current_request.set(state)
+        try:
+            response = await self.get_response(request)
+            if state.wrote:
+                # Пользователь сессии может ещё не быть загружен.
+                await sync_to_async(pin_to_primary)(request.user)
+        finally:
+            current_request.reset(token)
+        return response
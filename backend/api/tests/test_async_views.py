@@ -0,0 +1,152 @@
+from unittest import skipUnless
+
+from rest_framework.authtoken.models import Token
+
+from django.conf import settings
+from django.test import TestCase
+from django.urls import resolve
+
+from api.v1.async_views import (
+    RecipeDetailView,
+    RecipeListView,
+    RecipeUserListView,
+    SubscribeView,
+)
+from recipes.models import Favorite, Recipe, ShoppingCart
+from user.models import Follow, User
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="password",
+        first_name="Имя",
+        last_name="Фамилия",
+    )
+
+
+@skipUnless(settings.ASYNC_VIEWS, "Нужен ASYNC_VIEWS=True")
+class AsyncViewsTests(TestCase):
+    """Адреса подменяются при импорте urls, поэтому тесты запускаются
+    отдельно с ASYNC_VIEWS=True."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("reader")
+        cls.author = create_user("author")
+        cls.token = Token.objects.create(user=cls.user)
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author,
+                name=f"Рецепт {i}",
+                text="Описание",
+                cooking_time=10,
+                image="recipes/images/recipe.png",
+            )
+            for i in range(3)
+        ]
+        Favorite.objects.create(user=cls.user, recipe=cls.recipes[0])
+
+    def auth(self, token=None):
+        return {"Authorization": f"Token {token or self.token.key}"}
+
+    def test_urls_use_async_views(self):
+        recipe = self.recipes[0]
+        for url, view in (
+            ("/api/recipes/", RecipeListView),
+            (f"/api/recipes/{recipe.id}/", RecipeDetailView),
+            (f"/api/recipes/{recipe.id}/favorite/", RecipeUserListView),
+            (f"/api/recipes/{recipe.id}/shopping_cart/", RecipeUserListView),
+            (f"/api/users/{self.author.id}/subscribe/", SubscribeView),
+        ):
+            with self.subTest(url=url):
+                self.assertIs(resolve(url).func.view_class, view)
+
+    async def test_list_with_token(self):
+        response = await self.async_client.get(
+            "/api/recipes/", headers=self.auth()
+        )
+        self.assertEqual(response.status_code, 200)
+        favorited = {
+            row["id"]: row["is_favorited"]
+            for row in response.json()["results"]
+        }
+        self.assertEqual(
+            favorited,
+            {
+                recipe.id: recipe == self.recipes[0]
+                for recipe in self.recipes
+            },
+        )
+
+    async def test_invalid_token_is_rejected(self):
+        response = await self.async_client.get(
+            "/api/recipes/", headers=self.auth("invalid")
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("WWW-Authenticate", response)
+
+    async def test_list_pagination(self):
+        response = await self.async_client.get("/api/recipes/?limit=2")
+        data = response.json()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(len(data["results"]), 2)
+        response = await self.async_client.get("/api/recipes/?cursor=")
+        data = response.json()
+        self.assertNotIn("count", data)
+        self.assertEqual(
+            [row["id"] for row in data["results"]],
+            [recipe.id for recipe in reversed(self.recipes)],
+        )
+
+    async def test_detail_not_found(self):
+        response = await self.async_client.get("/api/recipes/0/")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_favorite_requires_authentication(self):
+        response = await self.async_client.post(
+            f"/api/recipes/{self.recipes[1].id}/favorite/"
+        )
+        self.assertEqual(response.status_code, 401)
+
+    async def test_shopping_cart_toggle(self):
+        url = f"/api/recipes/{self.recipes[1].id}/shopping_cart/"
+        statuses = [
+            (await method(url, headers=self.auth())).status_code
+            for method in (
+                self.async_client.post,
+                self.async_client.post,
+                self.async_client.delete,
+                self.async_client.delete,
+            )
+        ]
+        self.assertEqual(statuses, [201, 400, 204, 400])
+        self.assertFalse(
+            await ShoppingCart.objects.filter(user=self.user).aexists()
+        )
+
+    async def test_subscribe(self):
+        url = f"/api/users/{self.author.id}/subscribe/"
+        response = await self.async_client.post(url, headers=self.auth())
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.json()["is_subscribed"])
+        response = await self.async_client.delete(url, headers=self.auth())
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(await Follow.objects.aexists())
+
+    async def test_other_methods_fall_back_to_viewset(self):
+        recipe = self.recipes[2]
+        token = await Token.objects.acreate(user=self.author)
+        response = await self.async_client.delete(
+            f"/api/recipes/{recipe.id}/", headers=self.auth(token.key)
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(await Recipe.objects.filter(pk=recipe.pk).aexists())
+
+    async def test_browsable_api_falls_back_to_viewset(self):
+        response = await self.async_client.get(
+            "/api/recipes/", headers={"Accept": "text/html"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("text/html", response["Content-Type"])
@@ -0,0 +1,118 @@
+from datetime import datetime, timezone
+
+from rest_framework.test import APIClient
+
+from django.test import TestCase
+
+from recipes.models import Recipe, Tag
+from user.models import Follow, User
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="password",
+        first_name="Имя",
+        last_name="Фамилия",
+    )
+
+
+class KeysetPaginationTests(TestCase):
+    """Обход всех страниц по курсору возвращает те же объекты, что и
+    постраничная пагинация, без пропусков и повторов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("reader")
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f"Тег {i}", color=f"#00000{i}", slug=f"tag{i}")
+            for i in range(2)
+        )
+        authors = [create_user(f"author{i}") for i in range(7)]
+        for i in range(11):
+            recipe = Recipe.objects.create(
+                author=authors[i % len(authors)],
+                name=f"Рецепт {i}",
+                text="Описание",
+                cooking_time=10,
+                image="recipes/images/recipe.png",
+            )
+            recipe.tags.set(cls.tags[: 1 + i % 2])
+        # Одинаковая дата у нескольких рецептов: порядок между ними
+        # задаёт id.
+        Recipe.objects.filter(id__in=Recipe.objects.values("id")[2:8]).update(
+            pub_date=datetime(2024, 1, 1, tzinfo=timezone.utc)
+        )
+        Follow.objects.bulk_create(
+            Follow(user=cls.user, author=author) for author in authors
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk_cursor(self, url, params):
+        ids = []
+        response = self.client.get(url, {**params, "cursor": ""})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertNotIn("count", data)
+            ids.extend(row["id"] for row in data["results"])
+            if data["next"] is None:
+                return ids
+            response = self.client.get(data["next"])
+
+    def walk_pages(self, url, params):
+        ids = []
+        page = 1
+        while page is not None:
+            data = self.client.get(url, {**params, "page": page}).json()
+            ids.extend(row["id"] for row in data["results"])
+            page = page + 1 if data["next"] else None
+        return ids
+
+    def assert_same_results(self, url, params, expected):
+        ids = self.walk_cursor(url, params)
+        self.assertEqual(ids, expected)
+        self.assertCountEqual(ids, self.walk_pages(url, params))
+
+    def test_recipes_with_equal_pub_date(self):
+        expected = list(
+            Recipe.objects.order_by("-pub_date", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assert_same_results("/api/recipes/", {"limit": 3}, expected)
+
+    def test_recipes_filtered_by_several_tags(self):
+        expected = list(
+            Recipe.objects.filter(tags__in=self.tags)
+            .distinct()
+            .order_by("-pub_date", "-id")
+            .values_list("id", flat=True)
+        )
+        self.assert_same_results(
+            "/api/recipes/",
+            {"limit": 2, "tags": ["tag0", "tag1"]},
+            expected,
+        )
+
+    def test_subscriptions(self):
+        expected = list(
+            User.objects.filter(following__user=self.user)
+            .order_by("-id")
+            .values_list("id", flat=True)
+        )
+        self.assert_same_results(
+            "/api/users/subscriptions/", {"limit": 3}, expected
+        )
+
+    def test_invalid_cursor(self):
+        for cursor in ("not-base64!", "W10=", "WyJ4IiwgMV0="):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    "/api/recipes/", {"cursor": cursor}
+                )
+                self.assertEqual(response.status_code, 404)
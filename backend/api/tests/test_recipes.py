@@ -0,0 +1,453 @@
+import base64
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+from rest_framework.test import APIClient
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.v1.cache import get_recipe_list_cache_stats
+from jobs.models import Job
+from recipes.cache import bump_generation, get_generations
+from recipes.images import PENDING_IMAGES_DIR
+from recipes.indexes import ingredient_index
+from recipes.models import (
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    ShoppingCartIngredient,
+    Tag,
+)
+from recipes.shopping_cart import calculate_shopping_totals
+from recipes.user_lists import add_recipe
+from user.models import User
+
+
+def image_data_uri():
+    buffer = BytesIO()
+    Image.new("RGB", (40, 30), "red").save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class RecipeListQueriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="cook",
+            email="cook@example.com",
+            password="password",
+            first_name="Повар",
+            last_name="Поваров",
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(name=f"Тег {i}", color=f"#00000{i}", slug=f"tag{i}")
+            for i in range(3)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ингредиент {i}", measurement_unit="г")
+            for i in range(6)
+        )
+        for i in range(12):
+            recipe = Recipe.objects.create(
+                author=cls.user,
+                name=f"Рецепт {i}",
+                text="Описание",
+                cooking_time=10,
+                image="recipes/images/recipe.png",
+            )
+            recipe.tags.set(tags[: 1 + i % 3])
+            IngredientInRecipe.objects.bulk_create(
+                IngredientInRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=i + 1
+                )
+                for ingredient in ingredients[i % 3:]
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_same_queries(self, client):
+        # Первый запрос создаёт в кеше поколения и счётчики попаданий.
+        client.get("/api/recipes/?limit=1")
+        with CaptureQueriesContext(connection) as small:
+            response = client.get("/api/recipes/?limit=2")
+        self.assertEqual(len(response.json()["results"]), 2)
+        with self.assertNumQueries(len(small)):
+            response = client.get("/api/recipes/?limit=10")
+        self.assertEqual(len(response.json()["results"]), 10)
+
+    def test_queries_do_not_depend_on_page_size(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assert_same_queries(client)
+
+    def test_anonymous_queries_do_not_depend_on_page_size(self):
+        self.assert_same_queries(APIClient())
+
+    def test_anonymous_list_is_not_cached_in_database(self):
+        response = APIClient().get("/api/recipes/")
+        self.assertNotIn("X-Cache", response)
+
+    @mock.patch(
+        "api.v1.async_views.recipe_list_cache_enabled", return_value=True
+    )
+    @mock.patch("api.v1.views.recipe_list_cache_enabled", return_value=True)
+    def test_cache_hit_does_not_write(self, *mocks):
+        client = APIClient()
+        stats = get_recipe_list_cache_stats()
+        client.get("/api/recipes/")
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/recipes/")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertFalse(
+            [
+                query
+                for query in queries
+                if not query["sql"].startswith("SELECT")
+            ]
+        )
+        self.assertEqual(
+            get_recipe_list_cache_stats()["hits"], stats["hits"] + 1
+        )
+
+    def test_favorite_keeps_anonymous_cache(self):
+        recipe = Recipe.objects.first()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        generation = get_generations("recipes")
+        with self.captureOnCommitCallbacks(execute=True):
+            for method in (client.post, client.delete):
+                method(f"/api/recipes/{recipe.id}/favorite/")
+                method(f"/api/recipes/{recipe.id}/shopping_cart/")
+        self.assertEqual(get_generations("recipes"), generation)
+
+    def test_bulk_add_ignores_duplicate_ids(self):
+        first, second = Recipe.objects.order_by("id")[:2]
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            "/api/recipes/shopping_cart/",
+            {"recipes": [second.id, first.id, second.id]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [row["id"] for row in response.json()], [second.id, first.id]
+        )
+        second.refresh_from_db()
+        self.assertEqual(second.shopping_cart_count, 1)
+
+    def test_ingredients_are_flattened(self):
+        recipe = Recipe.objects.get(name="Рецепт 1")
+        response = APIClient().get(f"/api/recipes/{recipe.id}/")
+        row = IngredientInRecipe.objects.filter(recipe=recipe).first()
+        self.assertIn(
+            {
+                "id": row.ingredient_id,
+                "name": row.ingredient.name,
+                "measurement_unit": "г",
+                "amount": row.amount,
+            },
+            response.json()["ingredients"],
+        )
+
+
+class AnonymousRecipeActionsTests(TestCase):
+    def test_user_list_actions_require_authentication(self):
+        recipe = Recipe.objects.create(
+            author=User.objects.create_user(
+                username="cook",
+                email="cook@example.com",
+                password="password",
+                first_name="Повар",
+                last_name="Поваров",
+            ),
+            name="Суп",
+            text="Описание",
+            cooking_time=10,
+            image="recipes/images/recipe.png",
+        )
+        client = APIClient()
+        for method, url in (
+            (client.get, "/api/recipes/download_shopping_cart/"),
+            (client.post, f"/api/recipes/{recipe.id}/favorite/"),
+            (client.delete, f"/api/recipes/{recipe.id}/shopping_cart/"),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(method(url).status_code, 401)
+
+
+@override_settings(IMAGE_PROCESSING_ASYNC=False)
+class RecipeCreateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="cook",
+            email="cook@example.com",
+            password="password",
+            first_name="Повар",
+            last_name="Поваров",
+        )
+        cls.tag = Tag.objects.create(
+            name="Обед", color="#00FF00", slug="lunch"
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name="Соль", measurement_unit="г"
+        )
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.pending_dir = os.path.join(media_root, PENDING_IMAGES_DIR)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_recipe(self, amount=5):
+        return self.client.post(
+            "/api/recipes/",
+            {
+                "ingredients": [{"id": self.ingredient.id, "amount": amount}],
+                "tags": [self.tag.id],
+                "image": image_data_uri(),
+                "name": "Суп",
+                "text": "Описание",
+                "cooking_time": 10,
+            },
+            format="json",
+        )
+
+    def test_rendition_failure_keeps_recipe(self):
+        with mock.patch(
+            "recipes.tasks.create_renditions", side_effect=OSError
+        ), self.assertLogs("recipes.tasks", "ERROR"):
+            response = self.create_recipe()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["image_status"], "failed")
+        recipe = Recipe.objects.get()
+        self.assertEqual(recipe.image_status, Recipe.IMAGE_FAILED)
+        self.assertEqual(recipe.recipe.count(), 1)
+
+    def pending_files(self):
+        if not os.path.isdir(self.pending_dir):
+            return []
+        return os.listdir(self.pending_dir)
+
+    @override_settings(IMAGE_PROCESSING_ASYNC=True)
+    def test_pending_image_is_stored_with_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.create_recipe()
+        self.assertEqual(response.status_code, 201)
+        (name,) = self.pending_files()
+        job = Job.objects.get()
+        self.assertEqual(job.payload["path"], PENDING_IMAGES_DIR + name)
+
+    @override_settings(IMAGE_PROCESSING_ASYNC=True)
+    def test_invalid_recipe_stores_no_pending_image(self):
+        response = self.create_recipe(amount=0)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.pending_files(), [])
+
+    @override_settings(IMAGE_PROCESSING_ASYNC=True)
+    def test_rolled_back_recipe_removes_pending_image(self):
+        with mock.patch.object(
+            IngredientInRecipe.objects,
+            "bulk_create",
+            side_effect=RuntimeError,
+        ), self.assertRaises(RuntimeError):
+            self.create_recipe()
+        self.assertEqual(self.pending_files(), [])
+        self.assertFalse(Job.objects.exists())
+
+    def test_deleted_ingredient_is_rejected_with_stale_index(self):
+        self.addCleanup(ingredient_index.invalidate)
+        ingredient_index.search("")
+        # Удаление в другом процессе не сбрасывает индекс этого.
+        with mock.patch("recipes.signals.ingredient_index"):
+            Ingredient.objects.filter(pk=self.ingredient.pk).delete()
+        self.assertIn(self.ingredient, ingredient_index.search("Соль"))
+        response = self.create_recipe()
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_is_atomic(self):
+        with mock.patch.object(
+            IngredientInRecipe.objects,
+            "bulk_create",
+            side_effect=RuntimeError,
+        ), self.assertRaises(RuntimeError):
+            self.create_recipe()
+        self.assertFalse(Recipe.objects.exists())
+
+
+class RecipeUpdateMixin:
+    @classmethod
+    def create_recipe(cls):
+        cls.author = User.objects.create_user(
+            username="cook",
+            email="cook@example.com",
+            password="password",
+            first_name="Повар",
+            last_name="Поваров",
+        )
+        cls.tag = Tag.objects.create(
+            name="Обед", color="#00FF00", slug="lunch"
+        )
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ингредиент {i}", measurement_unit="г")
+            for i in range(6)
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author,
+            name="Суп",
+            text="Описание",
+            cooking_time=10,
+            image="recipes/images/recipe.png",
+        )
+        cls.recipe.tags.set([cls.tag])
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=cls.recipe, ingredient=ingredient, amount=amount
+            )
+            for ingredient, amount in zip(cls.ingredients, (100, 200, 300))
+        )
+
+    def authenticate(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def patch_ingredients(self, amounts):
+        return self.client.patch(
+            f"/api/recipes/{self.recipe.id}/",
+            {
+                "ingredients": [
+                    {"id": self.ingredients[index].id, "amount": amount}
+                    for index, amount in amounts.items()
+                ],
+                "tags": [self.tag.id],
+                "name": "Суп",
+                "text": "Описание",
+                "cooking_time": 10,
+            },
+            format="json",
+        )
+
+
+class RecipeUpdateBumpTests(RecipeUpdateMixin, TransactionTestCase):
+    """Счётчики поколений проверяются на настоящих фиксациях транзакций."""
+
+    def setUp(self):
+        self.create_recipe()
+        self.authenticate()
+
+    def test_update_bumps_recipes_generation_once(self):
+        with mock.patch(
+            "recipes.cache.bump_generation", wraps=bump_generation
+        ) as bump:
+            response = self.patch_ingredients({0: 100, 1: 250, 3: 50})
+        self.assertEqual(response.status_code, 200)
+        bump.assert_called_once_with("recipes")
+
+
+class RecipeUpdateTests(RecipeUpdateMixin, TestCase):
+    """Изменение состава рецепта из корзины переносит разницу в списки
+    покупок, не пересчитывая их."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_recipe()
+        cls.buyer = User.objects.create_user(
+            username="buyer",
+            email="buyer@example.com",
+            password="password",
+            first_name="Покупатель",
+            last_name="Покупателев",
+        )
+        other = Recipe.objects.create(
+            author=cls.author,
+            name="Каша",
+            text="Описание",
+            cooking_time=10,
+            image="recipes/images/recipe.png",
+        )
+        IngredientInRecipe.objects.create(
+            recipe=other, ingredient=cls.ingredients[0], amount=7
+        )
+        for recipe in (cls.recipe, other):
+            add_recipe(ShoppingCart, cls.buyer.id, recipe.id)
+
+    def setUp(self):
+        self.authenticate()
+
+    def assert_state(self, recipe_amounts, totals):
+        self.assertEqual(
+            dict(
+                IngredientInRecipe.objects.filter(
+                    recipe=self.recipe
+                ).values_list("ingredient_id", "amount")
+            ),
+            {
+                self.ingredients[index].id: amount
+                for index, amount in recipe_amounts.items()
+            },
+        )
+        stored = {
+            (row.user_id, row.ingredient_id): row.amount
+            for row in ShoppingCartIngredient.objects.all()
+        }
+        self.assertEqual(stored, dict(calculate_shopping_totals()))
+        self.assertEqual(
+            stored,
+            {
+                (self.buyer.id, self.ingredients[index].id): amount
+                for index, amount in totals.items()
+            },
+        )
+
+    def test_update_moves_difference_to_shopping_totals(self):
+        response = self.patch_ingredients({0: 100, 1: 250, 3: 50})
+        self.assertEqual(response.status_code, 200)
+        self.assert_state(
+            {0: 100, 1: 250, 3: 50}, {0: 107, 1: 250, 3: 50}
+        )
+
+    def test_unchanged_ingredients_are_not_written(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch_ingredients({0: 100, 1: 200, 2: 300})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            [
+                query
+                for query in queries
+                if "recipes_ingredientinrecipe" in query["sql"]
+                and not query["sql"].startswith("SELECT")
+            ]
+        )
+        self.assert_state(
+            {0: 100, 1: 200, 2: 300}, {0: 107, 1: 200, 2: 300}
+        )
+
+    def test_queries_do_not_depend_on_changed_rows(self):
+        with CaptureQueriesContext(connection) as few:
+            self.patch_ingredients({0: 100, 1: 250, 3: 50})
+        with self.assertNumQueries(len(few)):
+            response = self.patch_ingredients(
+                {1: 20, 3: 60, 2: 1, 4: 2, 5: 3}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assert_state(
+            {1: 20, 2: 1, 3: 60, 4: 2, 5: 3},
+            {0: 7, 1: 20, 2: 1, 3: 60, 4: 2, 5: 3},
+        )
@@ -0,0 +1,119 @@
+from unittest import skipUnless
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.db_router import REPLICA_DB, is_pinned, replica_enabled
+from recipes.models import Recipe
+from user.models import User
+
+
+def replicate():
+    """Копирует основную базу SQLite в реплику, как это сделала бы
+    репликация. Изменения после копирования реплика не видит."""
+    for alias in ("default", REPLICA_DB):
+        connections[alias].ensure_connection()
+    primary = connections["default"].connection
+    primary.backup(connections[REPLICA_DB].connection)
+
+
+@skipUnless(
+    replica_enabled(),
+    "Нужна реплика: DB_ENGINE=sqlite3 DB_REPLICA_NAME=db_replica.sqlite3",
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username="author",
+            email="author@example.com",
+            password="password",
+            first_name="Автор",
+            last_name="Рецептов",
+        )
+        self.user = User.objects.create_user(
+            username="reader",
+            email="reader@example.com",
+            password="password",
+            first_name="Читатель",
+            last_name="Рецептов",
+        )
+        self.recipe = self.create_recipe("Борщ")
+        self.token = Token.objects.create(user=self.user)
+        replicate()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token}")
+
+    def create_recipe(self, name):
+        return Recipe.objects.create(
+            author=self.author,
+            name=name,
+            text="Описание",
+            cooking_time=10,
+            image="recipes/images/recipe.png",
+        )
+
+    def get_names(self, client, url):
+        with CaptureQueriesContext(
+            connections["default"]
+        ) as primary, CaptureQueriesContext(
+            connections[REPLICA_DB]
+        ) as replica:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        names = [recipe["name"] for recipe in response.json()["results"]]
+        return names, len(primary), len(replica)
+
+    def test_safe_requests_read_from_replica(self):
+        self.create_recipe("Щи")
+        names, _, replica_queries = self.get_names(
+            APIClient(), "/api/recipes/"
+        )
+        self.assertEqual(names, ["Борщ"])
+        self.assertGreater(replica_queries, 0)
+
+    def test_writer_reads_own_writes_from_primary(self):
+        url = f"/api/recipes/{self.recipe.id}/favorite/"
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertTrue(is_pinned(self.user))
+
+        names, _, replica_queries = self.get_names(
+            self.client, "/api/recipes/?is_favorited=1"
+        )
+        self.assertEqual(names, ["Борщ"])
+        self.assertEqual(replica_queries, 0)
+
+        cache.clear()
+        names, _, replica_queries = self.get_names(
+            self.client, "/api/recipes/?is_favorited=1"
+        )
+        self.assertEqual(names, [])
+        self.assertGreater(replica_queries, 0)
+
+    def test_new_token_is_read_from_primary(self):
+        other = User.objects.create_user(
+            username="newcomer",
+            email="newcomer@example.com",
+            password="password",
+            first_name="Новый",
+            last_name="Пользователь",
+        )
+        client = APIClient()
+        response = client.post(
+            "/api/auth/token/login/",
+            {"email": other.email, "password": "password"},
+        )
+        self.assertEqual(response.status_code, 200)
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {response.json()['auth_token']}"
+        )
+        self.assertEqual(
+            client.get("/api/users/subscriptions/").status_code, 200
+        )
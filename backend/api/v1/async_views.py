@@ -0,0 +1,288 @@
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from rest_framework import exceptions, status
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpResponse
+from django.urls import URLPattern
+from django.utils.cache import patch_vary_headers
+from django.views import View
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.user_lists import add_recipe, remove_recipe
+from user.models import Follow, User
+
+from .authentication import AsyncTokenAuthentication
+from .cache import (
+    get_cached_recipe_list,
+    recipe_list_cache_enabled,
+    recipe_list_cache_key,
+    set_cached_recipe_list,
+)
+from .serializers import ShoppingListFavoiriteSerializer, UserSerializer
+from .views import RecipesViewSet
+
+
+def parse_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise Http404
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404
+
+
+async def load_followed_authors(request):
+    """Заполняет кеш get_followed_authors асинхронным запросом, чтобы
+    сериализаторы не обращались к базе из цикла событий."""
+    if request.user.is_authenticated and not hasattr(
+        request, "followed_authors"
+    ):
+        request.followed_authors = {
+            author_id
+            async for author_id in request.user.follower.values_list(
+                "author_id", flat=True
+            )
+        }
+
+
+def render_response(response):
+    """Отрисовывает Response DRF в обычный HttpResponse: ответ с
+    отложенной отрисовкой Django дорисовал бы в отдельном потоке."""
+    renderer = JSONRenderer()
+    content = b""
+    if response.data is not None:
+        content = renderer.render(response.data)
+    rendered = HttpResponse(
+        content, status=response.status_code, content_type=renderer.media_type
+    )
+    for header, value in response.items():
+        if header != "Content-Type":
+            rendered[header] = value
+    if not content:
+        del rendered["Content-Type"]
+    patch_vary_headers(rendered, ("Accept",))
+    return rendered
+
+
+class AsyncAPIView(View):
+    """Асинхронная реализация части методов адреса API. Прочие методы
+    и запросы браузерного API обрабатывает исходное синхронное
+    представление DRF fallback."""
+
+    fallback = None
+    authentication = AsyncTokenAuthentication()
+    authentication_required = False
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if not iscoroutinefunction(handler) or not self.renders_json(
+            request, kwargs
+        ):
+            return await sync_to_async(self.fallback)(
+                request, *args, **kwargs
+            )
+        kwargs.pop("format", None)
+        request = Request(request, parsers=[JSONParser()])
+        try:
+            await self.authenticate(request)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return render_response(response)
+
+    def renders_json(self, request, kwargs):
+        return (
+            kwargs.get("format") in (None, "json")
+            and request.GET.get("format") in (None, "json")
+            and "text/html" not in request.headers.get("Accept", "")
+        )
+
+    async def authenticate(self, request):
+        if request.authenticators:
+            # ForcedAuthentication тестового клиента DRF, без запросов.
+            user_auth = request.authenticators[0].authenticate(request)
+        else:
+            user_auth = await self.authentication.aauthenticate(request)
+        request.user, request.auth = user_auth or (AnonymousUser(), None)
+        if self.authentication_required and not request.user.is_authenticated:
+            raise exceptions.NotAuthenticated()
+
+    def handle_exception(self, exc):
+        if isinstance(
+            exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+        ):
+            exc.auth_header = self.authentication.authenticate_header(None)
+        response = exception_handler(exc, {"view": self})
+        if response is None:
+            raise exc
+        return response
+
+
+class RecipeViewMixin:
+    """Запросы и сериализаторы берутся у RecipesViewSet, чтобы ответы
+    совпадали с синхронными."""
+
+    def get_viewset(self, request, action):
+        return RecipesViewSet(
+            request=request,
+            action=action,
+            format_kwarg=None,
+            args=(),
+            kwargs={},
+        )
+
+
+class RecipeListView(RecipeViewMixin, AsyncAPIView):
+    """Список рецептов. Анонимным пользователям отдаётся из кеша, если
+    он в Redis или memcached."""
+
+    async def get(self, request):
+        if request.user.is_authenticated or not recipe_list_cache_enabled():
+            return await self.get_page(request)
+        key, data = await sync_to_async(self.get_cached)(request)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+        response = await self.get_page(request)
+        if response.status_code == status.HTTP_200_OK:
+            await sync_to_async(set_cached_recipe_list)(key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def get_cached(self, request):
+        key = recipe_list_cache_key(request)
+        return key, get_cached_recipe_list(key)
+
+    def select_page(self, viewset):
+        """Фильтры django-filter и пагинатор синхронные, поэтому
+        страница выбирается в потоке одним вызовом."""
+        return viewset.paginate_queryset(
+            viewset.filter_queryset(viewset.get_queryset())
+        )
+
+    async def get_page(self, request):
+        viewset = self.get_viewset(request, "list")
+        page = await sync_to_async(self.select_page)(viewset)
+        await load_followed_authors(request)
+        serializer = viewset.get_serializer(page, many=True)
+        return viewset.get_paginated_response(serializer.data)
+
+
+class RecipeDetailView(RecipeViewMixin, AsyncAPIView):
+    async def get(self, request, pk):
+        viewset = self.get_viewset(request, "retrieve")
+        recipe = await aget_object_or_404(
+            viewset.get_queryset(), pk=parse_pk(pk)
+        )
+        await load_followed_authors(request)
+        return Response(viewset.get_serializer(recipe).data)
+
+
+class RecipeUserListView(AsyncAPIView):
+    """Добавление рецепта в избранное или корзину и удаление из них.
+    Вставка, счётчики и итоги списка покупок меняются в одной
+    транзакции, а асинхронный ORM транзакций не поддерживает, поэтому
+    add_recipe и remove_recipe выполняются в потоке."""
+
+    model = None
+    authentication_required = True
+
+    async def post(self, request, pk):
+        recipe = await aget_object_or_404(Recipe.objects, pk=parse_pk(pk))
+        if not await sync_to_async(add_recipe)(
+            self.model, request.user.id, recipe.id
+        ):
+            return Response(
+                {"errors": "Рецепт  уже добавлен!"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = ShoppingListFavoiriteSerializer(recipe)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    async def delete(self, request, pk):
+        pk = parse_pk(pk)
+        if await sync_to_async(remove_recipe)(
+            self.model, request.user.id, pk
+        ):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        await aget_object_or_404(Recipe.objects, pk=pk)
+        return Response(
+            {"errors": "Рецепт уже убран!"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class SubscribeView(AsyncAPIView):
+    authentication_required = True
+
+    async def post(self, request, id):
+        user = request.user
+        author = await aget_object_or_404(User.objects, pk=parse_pk(id))
+        if user.id == author.id:
+            raise exceptions.ValidationError(
+                "Подписываться на себя запрещено."
+            )
+        if await Follow.objects.filter(user=user, author=author).aexists():
+            raise exceptions.ValidationError(
+                "Вы уже подписаны на этого пользователя."
+            )
+        await Follow.objects.acreate(user=user, author=author)
+        await load_followed_authors(request)
+        serializer = UserSerializer(author, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    async def delete(self, request, id):
+        author_id = parse_pk(id)
+        deleted, _ = await Follow.objects.filter(
+            user=request.user, author_id=author_id
+        ).adelete()
+        if deleted:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        await aget_object_or_404(User.objects, pk=author_id)
+        raise exceptions.ValidationError(
+            "Вы не подписаны на этого пользователя."
+        )
+
+
+ASYNC_VIEWS = {
+    "recipes-list": RecipeListView.as_view,
+    "recipes-detail": RecipeDetailView.as_view,
+    "recipes-favorite": partial(RecipeUserListView.as_view, model=Favorite),
+    "recipes-shopping-cart": partial(
+        RecipeUserListView.as_view, model=ShoppingCart
+    ),
+    "users-subscribe": SubscribeView.as_view,
+}
+
+
+def use_async_views(patterns):
+    """Подменяет представления адресов роутера из ASYNC_VIEWS
+    асинхронными. Исходное представление остаётся запасным."""
+    return [
+        URLPattern(
+            pattern.pattern,
+            ASYNC_VIEWS[pattern.name](fallback=pattern.callback),
+            pattern.default_args,
+            pattern.name,
+        )
+        if pattern.name in ASYNC_VIEWS
+        else pattern
+        for pattern in patterns
+    ]
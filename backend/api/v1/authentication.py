@@ -0,0 +1,28 @@
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from django.utils.translation import gettext_lazy as _
+
+
+class AsyncTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication для асинхронных представлений. Заголовок
+    разбирает унаследованный authenticate, который здесь возвращает
+    только ключ, а токен загружается асинхронным ORM."""
+
+    def authenticate_credentials(self, key):
+        return key
+
+    async def aauthenticate(self, request):
+        key = self.authenticate(request)
+        if key is None:
+            return None
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related("user").aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+        return token.user, token
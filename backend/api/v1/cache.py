@@ -0,0 +1,66 @@
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.cache import get_generations
+
+
+RECIPE_LIST_GENERATIONS = ("recipes", "tags", "ingredients", "users")
+# Бэкенды, в которых чтение страницы дешевле её сборки. С DatabaseCache
+# попадание стоило бы больше запросов, чем список без кеша.
+FAST_CACHE_BACKENDS = (
+    "django.core.cache.backends.redis.RedisCache",
+    "django.core.cache.backends.memcached.PyMemcacheCache",
+    "django.core.cache.backends.memcached.PyLibMCCache",
+)
+
+# Попадания и промахи считаются в памяти процесса, без записи в кеш на
+# каждое чтение.
+_stats = Counter()
+
+
+def recipe_list_cache_enabled():
+    return settings.CACHES["default"]["BACKEND"] in FAST_CACHE_BACKENDS
+
+
+def recipe_list_cache_key(request):
+    """Ключ кеша страницы списка рецептов. Учитывает только параметры,
+    от которых зависит ответ анонимному пользователю, в нормализованном
+    виде, и текущие поколения рецептов, тегов, ингредиентов и авторов.
+    """
+    params = request.query_params
+    normalized = "|".join(
+        (
+            request.get_host(),
+            ",".join(sorted(set(params.getlist("tags")))),
+            params.get("author", ""),
+            params.get("search", "").strip(),
+            params.get("page", "1"),
+            params.get("cursor", "-"),
+            params.get("limit", str(settings.PAGE_SIZE)),
+            ",".join(map(str, get_generations(*RECIPE_LIST_GENERATIONS))),
+        )
+    )
+    digest = hashlib.md5(normalized.encode()).hexdigest()
+    return f"recipe_list_cache:{digest}"
+
+
+def get_cached_recipe_list(key):
+    data = cache.get(key)
+    _stats["misses" if data is None else "hits"] += 1
+    return data
+
+
+def set_cached_recipe_list(key, data):
+    cache.set(key, data, settings.RECIPE_LIST_CACHE_TIMEOUT)
+
+
+def get_recipe_list_cache_stats():
+    """Попадания и промахи кеша в текущем процессе."""
+    return {
+        "enabled": recipe_list_cache_enabled(),
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+    }
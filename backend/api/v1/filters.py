@@ -1,7 +1,10 @@
 from django_filters.rest_framework import FilterSet, filters
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 
+from api.v1.pagination import CustomPaginator
 from recipes.models import Recipe, Tag
+from recipes.search import search_recipes
 
 
 class RecipeFilter(FilterSet):
@@ -16,6 +19,7 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method="is_in_shopping_cart_filter"
     )
+    search = filters.CharFilter(method="search_filter")
 
     class Meta:
         model = Recipe
@@ -24,6 +28,7 @@ class RecipeFilter(FilterSet):
             "author",
             "is_favorited",
             "is_in_shopping_cart",
+            "search",
         )
 
     def is_favorited_filter(self, queryset, name, data):
@@ -38,6 +43,15 @@ class RecipeFilter(FilterSet):
             return queryset.filter(shopping_recipes__user=user)
         return queryset
 
+    def search_filter(self, queryset, name, data):
+        # Курсор строится по дате и id, а результаты поиска упорядочены
+        # по релевантности: следующая страница была бы неверной.
+        if CustomPaginator.cursor_query_param in self.request.query_params:
+            raise ValidationError(
+                {"cursor": "Поиск не поддерживает пагинацию по курсору."}
+            )
+        return search_recipes(queryset, data)
+
 
 class IngredientFilter(SearchFilter):
     """Класс для фильтрации обьектов Tags."""
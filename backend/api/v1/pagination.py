@@ -1,10 +1,123 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPaginator(BasePagination):
+    """Пагинация по ключу (keyset). Следующая страница выбирается
+    условием на поля ordering относительно последней записи текущей,
+    поэтому не нужны ни COUNT(*), ни OFFSET."""
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    invalid_cursor_message = "Неверный курсор."
+
+    def __init__(self, ordering, page_size=settings.PAGE_SIZE):
+        self.ordering = ordering
+        self.page_size = page_size
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return page_size if page_size > 0 else self.page_size
+
+    def decode_cursor(self, request, model):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance):
+        values = [
+            getattr(instance, field.lstrip("-")) for field in self.ordering
+        ]
+        data = json.dumps(values, default=lambda value: value.isoformat())
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def position_filter(self, position):
+        """Строки строго после position в порядке ordering."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(position))
+        page = list(queryset[: page_size + 1])
+        self.next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self.encode_cursor(page[-1])
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), "page")
+        return replace_query_param(
+            url, self.cursor_query_param, self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", None),
+                    ("results", data),
+                ]
+            )
+        )
 
 
 class CustomPaginator(PageNumberPagination):
-    """Класс пагинации страниц."""
+    """Класс пагинации страниц. Если у представления задан
+    cursor_ordering, а в запросе передан параметр cursor (в том числе
+    пустой), используется пагинация по ключу."""
 
     page_size = settings.PAGE_SIZE
     page_size_query_param = "limit"
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, "cursor_ordering", None)
+        self.keyset = None
+        if ordering and self.cursor_query_param in request.query_params:
+            self.keyset = KeysetPaginator(ordering, self.page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,27 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class ShoppingCartRenderer(BaseRenderer):
+    """Рендерер для выбора формата списка покупок. Сам файл отдаётся
+    потоком из представления, здесь рендерятся только ошибки."""
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if not isinstance(data, str):
+            data = json.dumps(data, ensure_ascii=False)
+        return data.encode(self.charset)
+
+
+class ShoppingCartTextRenderer(ShoppingCartRenderer):
+    media_type = "text/plain"
+    format = "txt"
+
+
+class ShoppingCartCSVRenderer(ShoppingCartRenderer):
+    media_type = "text/csv"
+    format = "csv"
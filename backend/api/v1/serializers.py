@@ -1,13 +1,26 @@
-import base64
-
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from django.db.models import Q
-
+from django.utils.functional import cached_property
+
+from jobs.registry import enqueue
+from recipes.images import (
+    PendingImage,
+    decode_base64_image,
+    pending_image,
+    pending_image_file,
+)
 from recipes.models import Ingredient, IngredientInRecipe, Recipe, Tag
+from recipes.shopping_cart import change_shopping_totals
+from recipes.tasks import schedule_renditions
 from user.models import Follow, User
 
+from .utils import get_followed_authors
+
 
 MIN_VALUE = 0
 
@@ -37,17 +50,120 @@ class IngredientsInRecipeReadSerializer(serializers.ModelSerializer):
         model = IngredientInRecipe
         fields = ("id", "name", "measurement_unit", "amount")
 
+    def to_representation(self, instance):
+        ingredient = instance.ingredient
+        return {
+            "id": ingredient.id,
+            "name": ingredient.name,
+            "measurement_unit": ingredient.measurement_unit,
+            "amount": instance.amount,
+        }
+
 
 class Base64ImageField(serializers.ImageField):
+    """При IMAGE_PROCESSING_ASYNC изображение не декодируется в запросе,
+    а передаётся фоновому воркеру как PendingImage. Файл для воркера
+    записывает сериализатор рецепта в транзакции сохранения."""
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith("data:image"):
-            format, imgstr = data.split(";base64,")
-            ext = format.split("/")[-1]
-            data = ContentFile(base64.b64decode(imgstr), name="temp." + ext)
+            try:
+                if settings.IMAGE_PROCESSING_ASYNC:
+                    return pending_image(data)
+                data = decode_base64_image(data)
+            except DjangoValidationError as error:
+                raise serializers.ValidationError(error.messages)
 
         return super().to_internal_value(data)
 
 
+def missing_pks_error(pks):
+    return serializers.ValidationError(
+        "Недопустимые первичные ключи "
+        f"{', '.join(map(str, pks))} - объекты не существуют."
+    )
+
+
+def unique_missing(pks, found):
+    return list(dict.fromkeys(pk for pk in pks if pk not in found))
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+        return self.child_relation.to_internal_value_many(data)
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """С many=True находит все переданные объекты одним запросом и
+    сообщает обо всех несуществующих id в одной ошибке."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def to_internal_value_many(self, data):
+        pk_field = self.get_queryset().model._meta.pk
+        pks = []
+        for pk in data:
+            try:
+                pks.append(pk_field.to_python(pk))
+            except (DjangoValidationError, TypeError):
+                self.fail("incorrect_type", data_type=type(pk).__name__)
+        found = self.get_queryset().in_bulk(set(pks))
+        missing = unique_missing(pks, found)
+        if missing:
+            raise missing_pks_error(missing)
+        return [found[pk] for pk in pks]
+
+
+class IngredientsInRecipeListSerializer(serializers.ListSerializer):
+    """Находит ингредиенты всех строк рецепта одним запросом к базе.
+    Индекс ингредиентов в других процессах может устареть, поэтому
+    проверка по нему пропустила бы удалённый ингредиент."""
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        pks = [item["id"] for item in items]
+        found = Ingredient.objects.in_bulk(set(pks))
+        missing = unique_missing(pks, found)
+        if missing:
+            raise missing_pks_error(missing)
+        for item in items:
+            item["id"] = found[item["id"]]
+        return items
+
+
+class RecipeImagesMixin(serializers.Serializer):
+    """Ссылки на уменьшенные копии фотографии рецепта. Пока копии не
+    созданы, отдаётся ссылка на оригинал."""
+
+    image_card = serializers.SerializerMethodField()
+    image_detail = serializers.SerializerMethodField()
+
+    def get_rendition_url(self, obj, field):
+        image = getattr(obj, field) or obj.image
+        if not image:
+            return None
+        request = self.context.get("request")
+        if request is not None:
+            return request.build_absolute_uri(image.url)
+        return image.url
+
+    def get_image_card(self, obj):
+        return self.get_rendition_url(obj, "image_card")
+
+    def get_image_detail(self, obj):
+        return self.get_rendition_url(obj, "image_detail")
+
+
 class TagsSerializer(serializers.ModelSerializer):
     """Сериализация объектов типа Tags. Список тегов."""
 
@@ -78,10 +194,11 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        user = self.context.get("request").user
+        request = self.context.get("request")
+        user = request.user
         if user is None or user.is_anonymous:
             return False
-        return user.follower.filter(author=obj).exists()
+        return obj.id in get_followed_authors(request)
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -118,7 +235,9 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return data
 
 
-class ShoppingListFavoiriteSerializer(serializers.ModelSerializer):
+class ShoppingListFavoiriteSerializer(
+    RecipeImagesMixin, serializers.ModelSerializer
+):
     """Лист покупок."""
 
     image = Base64ImageField(read_only=True)
@@ -131,6 +250,7 @@ class ShoppingListFavoiriteSerializer(serializers.ModelSerializer):
             "id",
             "name",
             "image",
+            "image_card",
             "cooking_time",
         )
 
@@ -171,20 +291,28 @@ class FollowSerializer(serializers.ModelSerializer):
         return data
 
     def get_recipes(self, obj):
-        request = self.context.get("request")
-        query_params = request.query_params
-        queryset = obj.recipes.all()
-        if "recipes_limit" in query_params:
-            recipes_limit = query_params["recipes_limit"]
-            queryset = queryset[: int(recipes_limit)]
-        serializer = ShoppingListFavoiriteSerializer(queryset, many=True)
-        return serializer.data
+        if hasattr(obj, "page_recipes"):
+            queryset = obj.page_recipes
+        else:
+            request = self.context.get("request")
+            recipes_limit = request.query_params.get("recipes_limit", "")
+            queryset = obj.recipes.all()
+            if recipes_limit.isdigit():
+                queryset = queryset[: int(recipes_limit)]
+        return [
+            self.recipe_serializer.to_representation(recipe)
+            for recipe in queryset
+        ]
+
+    @cached_property
+    def recipe_serializer(self):
+        return ShoppingListFavoiriteSerializer()
 
 
 class IngredientsInRecipeWriteSerializer(serializers.ModelSerializer):
     """Сериализатор добавления ингредиента в рецепт."""
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
 
     class Meta:
         model = IngredientInRecipe
@@ -192,9 +320,19 @@ class IngredientsInRecipeWriteSerializer(serializers.ModelSerializer):
             "id",
             "amount",
         )
+        list_serializer_class = IngredientsInRecipeListSerializer
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список рецептов для массового добавления в избранное или
+    корзину и удаления из них."""
+
+    recipes = BulkPrimaryKeyRelatedField(
+        many=True, queryset=Recipe.objects.all()
+    )
 
 
-class RecipesReadSerializer(serializers.ModelSerializer):
+class RecipesReadSerializer(RecipeImagesMixin, serializers.ModelSerializer):
     """Сериализация объектов типа Recipes. Чтение рецептов."""
 
     is_favorited = serializers.SerializerMethodField(read_only=True)
@@ -215,6 +353,9 @@ class RecipesReadSerializer(serializers.ModelSerializer):
             "ingredients",
             "name",
             "image",
+            "image_card",
+            "image_detail",
+            "image_status",
             "text",
             "cooking_time",
             "is_favorited",
@@ -223,25 +364,25 @@ class RecipesReadSerializer(serializers.ModelSerializer):
 
     def get_is_favorited(self, obj):
         user = self.context.get("request").user
-        return (
-            user.is_authenticated
-            and obj.favorite_recipes.filter(user=user).exists()
-        )
+        if not user.is_authenticated:
+            return False
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
+        return obj.favorite_recipes.filter(user=user).exists()
 
     def get_is_in_shopping_cart(self, obj):
         user = self.context.get("request").user
-        return (
-            user.is_authenticated
-            and obj.shopping_recipes.filter(user=user).exists()
-        )
+        if not user.is_authenticated:
+            return False
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
+        return obj.shopping_recipes.filter(user=user).exists()
 
 
 class RecipesWriteSerializer(serializers.ModelSerializer):
     """Сериализация объектов типа Recipes. Запись и обновление рецептов."""
 
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Tag.objects.all()
-    )
+    tags = BulkPrimaryKeyRelatedField(many=True, queryset=Tag.objects.all())
     ingredients = IngredientsInRecipeWriteSerializer(
         many=True, source="recipe"
     )
@@ -256,28 +397,29 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
             "ingredients",
             "tags",
             "image",
+            "image_status",
             "name",
             "text",
             "cooking_time",
         )
-        read_only_fields = ("author",)
+        read_only_fields = ("author", "image_status")
 
     def validate(self, data):
         ingredients = data["recipe"]
         tags = data["tags"]
         cooking_time = data["cooking_time"]
-        ingredients_list = []
+        ingredient_ids = set()
         if not ingredients:
             raise serializers.ValidationError("Добавьте ингредиенты!")
         if not tags:
             raise serializers.ValidationError("Добавьте тэг!")
         for ingredient in ingredients:
             ingredient_id = ingredient["id"]
-            if ingredient_id in ingredients_list:
+            if ingredient_id in ingredient_ids:
                 raise serializers.ValidationError(
                     "Ингредиенты должны быть уникальными."
                 )
-            ingredients_list.append(ingredient_id)
+            ingredient_ids.add(ingredient_id)
             amount = ingredient["amount"]
             if int(amount) <= MIN_VALUE:
                 raise serializers.ValidationError(
@@ -301,20 +443,89 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
             ]
         )
 
+    def pop_image(self, validated_data):
+        """Убирает из данных фотографию, ожидающую фоновой обработки."""
+        image = validated_data.get("image")
+        if isinstance(image, PendingImage):
+            del validated_data["image"]
+            validated_data["image_status"] = Recipe.IMAGE_PENDING
+            return image
+        return None
+
+    def process_image(self, recipe, path):
+        """Фотографию из файла path обрабатывает фоновая задача, которая
+        ставится в транзакции сохранения рецепта. Без неё уменьшенные
+        копии создаются после фиксации."""
+        if path is not None:
+            enqueue("recipes.process_image", recipe_id=recipe.id, path=path)
+
     def create(self, validated_data):
         tags = validated_data.pop("tags")
         ingredients = validated_data.pop("recipe")
+        image = self.pop_image(validated_data)
         user = self.context.get("request").user
-        recipe = Recipe.objects.create(author=user, **validated_data)
-        recipe.tags.set(tags)
-        self.create_update_ingredient(ingredients, recipe)
+        with pending_image_file(image) as path, transaction.atomic():
+            recipe = Recipe.objects.create(author=user, **validated_data)
+            recipe.tags.set(tags)
+            self.create_update_ingredient(ingredients, recipe)
+            self.process_image(recipe, path)
+        if path is None:
+            schedule_renditions(recipe)
         return recipe
 
+    def update_ingredients(self, recipe, ingredients):
+        """Приводит ингредиенты рецепта к переданным: удаляет, обновляет и
+        создаёт только отличающиеся строки и переносит разницу в списки
+        покупок."""
+        new_amounts = {
+            ingredient["id"].id: ingredient["amount"]
+            for ingredient in ingredients
+        }
+        rows = {
+            row.ingredient_id: row
+            for row in IngredientInRecipe.objects.filter(recipe=recipe)
+        }
+        old_amounts = {
+            ingredient_id: row.amount for ingredient_id, row in rows.items()
+        }
+        removed = [
+            row.id
+            for ingredient_id, row in rows.items()
+            if ingredient_id not in new_amounts
+        ]
+        changed = []
+        for ingredient_id, row in rows.items():
+            amount = new_amounts.get(ingredient_id, row.amount)
+            if row.amount != amount:
+                row.amount = amount
+                changed.append(row)
+        added = [
+            IngredientInRecipe(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in new_amounts.items()
+            if ingredient_id not in rows
+        ]
+        if not (removed or changed or added):
+            return
+        if removed:
+            IngredientInRecipe.objects.filter(id__in=removed).delete()
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ["amount"])
+        if added:
+            IngredientInRecipe.objects.bulk_create(added)
+        change_shopping_totals(recipe, old_amounts, new_amounts)
+
     def update(self, instance, validated_data):
         tags = validated_data.pop("tags")
-        instance.tags.clear()
-        instance.tags.set(tags)
         ingredients = validated_data.pop("recipe")
-        instance.ingredients.clear()
-        self.create_update_ingredient(ingredients, instance)
-        return super().update(instance, validated_data)
+        image_changed = "image" in validated_data
+        image = self.pop_image(validated_data)
+        with pending_image_file(image) as path, transaction.atomic():
+            instance.tags.set(tags)
+            self.update_ingredients(instance, ingredients)
+            instance = super().update(instance, validated_data)
+            self.process_image(instance, path)
+        if image_changed and path is None:
+            schedule_renditions(instance)
+        return instance
@@ -0,0 +1,87 @@
+import gzip
+import hashlib
+from typing import NamedTuple
+
+from rest_framework.renderers import JSONRenderer
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from recipes.cache import get_generations
+
+
+class Snapshot(NamedTuple):
+    etag: str
+    content: bytes
+    gzip_content: bytes
+
+
+_local_snapshots = {}
+
+
+def build_snapshot(queryset, serializer_class):
+    content = JSONRenderer().render(serializer_class(queryset, many=True).data)
+    return Snapshot(
+        etag=hashlib.sha1(content).hexdigest(),
+        content=content,
+        gzip_content=gzip.compress(content),
+    )
+
+
+def get_snapshot(name, queryset, serializer_class):
+    """Сериализованная таблица справочника вместе с gzip-копией.
+    Пересобирается только после изменения поколения name, между
+    запросами хранится в памяти процесса и в общем кеше. Поколение
+    читается из общего кеша на каждый запрос, поэтому копия в памяти
+    устаревает сразу после изменения в любом процессе."""
+    (generation,) = get_generations(name)
+    local = _local_snapshots.get(name)
+    if local is not None and local[0] == generation:
+        return local[1]
+    key = f"snapshot:{name}:{generation}"
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_snapshot(queryset, serializer_class)
+        cache.set(key, snapshot, timeout=None)
+    _local_snapshots[name] = (generation, snapshot)
+    return snapshot
+
+
+def snapshot_response(request, snapshot):
+    """Ответ со снимком справочника: 304 при совпадении If-None-Match,
+    иначе JSON, сжатый gzip, если клиент его принимает."""
+    use_gzip = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+    etag = f'"{snapshot.etag}-gzip"' if use_gzip else f'"{snapshot.etag}"'
+    if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+    if "*" in if_none_match or etag in if_none_match:
+        response = HttpResponseNotModified()
+    elif use_gzip:
+        response = HttpResponse(
+            snapshot.gzip_content, content_type="application/json"
+        )
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(
+            snapshot.content, content_type="application/json"
+        )
+    response["ETag"] = etag
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+class SnapshotListMixin:
+    """Отдаёт список справочника из версионированного снимка."""
+
+    snapshot_name = None
+
+    def list(self, request, *args, **kwargs):
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return super().list(request, *args, **kwargs)
+        snapshot = get_snapshot(
+            self.snapshot_name,
+            self.filter_queryset(self.get_queryset()),
+            self.get_serializer_class(),
+        )
+        return snapshot_response(request, snapshot)
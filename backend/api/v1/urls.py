@@ -1,8 +1,11 @@
 from rest_framework import routers
 
+from django.conf import settings
 from django.urls import include, path
 
+from api.v1.async_views import use_async_views
 from api.v1.views import (
+    DatabasePoolStatsView,
     IngredientsViewSet,
     RecipesViewSet,
     TagsViewSet,
@@ -19,9 +22,17 @@ router.register(r"tags", TagsViewSet, basename="tags")
 router.register(r"recipes", RecipesViewSet, basename="recipes")
 router.register(r"ingredients", IngredientsViewSet, basename="ingredients")
 
+router_urls = router.urls
+if settings.ASYNC_VIEWS:
+    router_urls = use_async_views(router_urls)
 
 urlpatterns = [
-    path("", include(router.urls)),
+    path(
+        "db_pool_stats/",
+        DatabasePoolStatsView.as_view(),
+        name="db-pool-stats",
+    ),
+    path("", include(router_urls)),
     path("", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
 ]
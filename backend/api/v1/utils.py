@@ -1,10 +1,77 @@
-def create_shopping_cart_file(ingredients):
-    """Загрузка списка покупок с ингредиентами."""
-    shopping_list = "Список покупок: \n"
+import csv
+import json
+
+
+def get_followed_authors(request):
+    """Множество id авторов, на которых подписан пользователь запроса.
+    Загружается одним запросом и кешируется на объекте запроса, чтобы
+    все сериализаторы ответа использовали общий результат.
+    """
+    if not hasattr(request, "followed_authors"):
+        request.followed_authors = set(
+            request.user.follower.values_list("author_id", flat=True)
+        )
+    return request.followed_authors
+
+
+def shopping_cart_txt(ingredients):
+    """Список покупок в виде текста."""
+    yield "Список покупок: \n"
     for ingredient in ingredients:
-        shopping_list += (
+        yield (
             f"{ingredient['ingredient__name']} - "
             f"{ingredient['amount_sum']} "
             f"({ingredient['ingredient__measurement_unit']}) \n"
         )
-    return shopping_list
+
+
+def shopping_cart_csv(ingredients):
+    """Список покупок в формате CSV."""
+    line = EchoBuffer()
+    writer = csv.writer(line)
+    yield writer.writerow(("name", "measurement_unit", "amount"))
+    for ingredient in ingredients:
+        yield writer.writerow(
+            (
+                ingredient["ingredient__name"],
+                ingredient["ingredient__measurement_unit"],
+                ingredient["amount_sum"],
+            )
+        )
+
+
+def shopping_cart_json(ingredients):
+    """Список покупок в виде JSON-массива."""
+    separator = "["
+    for ingredient in ingredients:
+        yield separator + json.dumps(
+            {
+                "name": ingredient["ingredient__name"],
+                "measurement_unit": ingredient["ingredient__measurement_unit"],
+                "amount": ingredient["amount_sum"],
+            },
+            ensure_ascii=False,
+        )
+        separator = ","
+    yield "[]" if separator == "[" else "]"
+
+
+class EchoBuffer:
+    """Файлоподобный объект для csv.writer, возвращающий записанную
+    строку вместо её накопления."""
+
+    def write(self, value):
+        return value
+
+
+SHOPPING_CART_EXPORTERS = {
+    "txt": shopping_cart_txt,
+    "csv": shopping_cart_csv,
+    "json": shopping_cart_json,
+}
+
+
+def create_shopping_cart_file(ingredients, file_format="txt"):
+    """Загрузка списка покупок с ингредиентами. Возвращает генератор
+    строк, пригодный для StreamingHttpResponse."""
+    return SHOPPING_CART_EXPORTERS[file_format](ingredients)
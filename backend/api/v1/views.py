@@ -2,60 +2,99 @@ from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import exceptions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.permissions import (
+    SAFE_METHODS,
+    IsAdminUser,
+    IsAuthenticated,
+)
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from django.db.models import Count, Sum
-from django.shortcuts import HttpResponse, get_object_or_404
+from django.db.models import Exists, F, OuterRef, Prefetch, Window
+from django.db.models.functions import RowNumber
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 
+from foodgram_backend.db_pool.pool import pool_stats
+from recipes.indexes import ingredient_index
 from recipes.models import (
     Favorite,
     Ingredient,
     IngredientInRecipe,
     Recipe,
     ShoppingCart,
+    ShoppingCartIngredient,
     Tag,
 )
+from recipes.user_lists import (
+    add_recipe,
+    add_recipes,
+    remove_recipe,
+    remove_recipes,
+)
 from user.models import Follow, User
 
+from .cache import (
+    get_cached_recipe_list,
+    get_recipe_list_cache_stats,
+    recipe_list_cache_enabled,
+    recipe_list_cache_key,
+    set_cached_recipe_list,
+)
 from .filters import IngredientFilter, RecipeFilter
 from .pagination import CustomPaginator
 from .permissions import AuthorOrReadOnly
+from .renderers import ShoppingCartCSVRenderer, ShoppingCartTextRenderer
 from .serializers import (
     FollowSerializer,
     IngredientsSerializer,
+    RecipeIdsSerializer,
     RecipesReadSerializer,
     RecipesWriteSerializer,
     ShoppingListFavoiriteSerializer,
     TagsSerializer,
     UserSerializer,
 )
+from .snapshots import SnapshotListMixin
 from .utils import create_shopping_cart_file
 
 
-class TagsViewSet(viewsets.ModelViewSet):
+class TagsViewSet(SnapshotListMixin, viewsets.ModelViewSet):
     """Класс для работы с моделью Tags."""
 
     queryset = Tag.objects.all()
     serializer_class = TagsSerializer
+    snapshot_name = "tags"
 
 
-class IngredientsViewSet(viewsets.ModelViewSet):
+class IngredientsViewSet(SnapshotListMixin, viewsets.ModelViewSet):
     """Класс для работы с Ingredients."""
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientsSerializer
     filter_backends = [IngredientFilter]
     search_fields = ("^name",)
+    snapshot_name = "ingredients"
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get(IngredientFilter.search_param)
+        if not name:
+            return super().list(request, *args, **kwargs)
+        serializer = self.get_serializer(
+            ingredient_index.search(name), many=True
+        )
+        return Response(serializer.data)
 
 
 class UsersViewSet(UserViewSet):
     """Класс для работы с User."""
 
     serializer_class = UserSerializer
+    cursor_ordering = ("-id",)
 
     def get_queryset(self):
-        return User.objects.all().annotate(recipes_count=Count("recipes"))
+        return User.objects.all()
 
     @action(
         detail=False,
@@ -75,8 +114,18 @@ class UsersViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         user = self.request.user
-        queryset = User.objects.filter(following__user=user).annotate(
-            recipes_count=Count("recipes")
+        recipes = Recipe.objects.all()
+        recipes_limit = request.query_params.get("recipes_limit", "")
+        if recipes_limit.isdigit():
+            recipes = recipes.annotate(
+                row_number=Window(
+                    expression=RowNumber(),
+                    partition_by=F("author"),
+                    order_by=("-pub_date", "-id"),
+                )
+            ).filter(row_number__lte=int(recipes_limit))
+        queryset = User.objects.filter(following__user=user).prefetch_related(
+            Prefetch("recipes", queryset=recipes, to_attr="page_recipes")
         )
         page = self.paginate_queryset(queryset)
         serializer = FollowSerializer(
@@ -125,35 +174,72 @@ class RecipesViewSet(viewsets.ModelViewSet):
 
     queryset = Recipe.objects.prefetch_related(
         "tags",
-        "ingredients",
+        Prefetch(
+            "recipe",
+            queryset=IngredientInRecipe.objects.select_related("ingredient"),
+        ),
     ).select_related("author")
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_class = [AuthorOrReadOnly]
     pagination_class = CustomPaginator
+    cursor_ordering = ("-pub_date", "-id")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                is_favorited=Exists(
+                    Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+                ),
+                is_in_shopping_cart=Exists(
+                    ShoppingCart.objects.filter(
+                        user=user, recipe=OuterRef("pk")
+                    )
+                ),
+            )
+        return queryset
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipesReadSerializer
         return RecipesWriteSerializer
 
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated or not recipe_list_cache_enabled():
+            return super().list(request, *args, **kwargs)
+        key = recipe_list_cache_key(request)
+        data = get_cached_recipe_list(key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_cached_recipe_list(key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+    @action(
+        methods=["GET"],
+        detail=False,
+        permission_classes=(IsAdminUser,),
+    )
+    def cache_stats(self, request):
+        return Response(get_recipe_list_cache_stats())
+
     def post_delete_recipe(self, request, pk, model):
         recipe = get_object_or_404(Recipe, pk=pk)
         user = self.request.user
         if request.method == "POST":
-            serializer = ShoppingListFavoiriteSerializer(recipe)
-            if model.objects.filter(user=user, recipe=recipe).exists():
+            if not add_recipe(model, user.id, recipe.id):
                 return Response(
                     {"errors": "Рецепт  уже добавлен!"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-
-            model.objects.create(user=user, recipe=recipe)
+            serializer = ShoppingListFavoiriteSerializer(recipe)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         elif request.method == "DELETE":
-            if (model.objects.filter(user=user, recipe=recipe).delete())[
-                0
-            ] != 0:
+            if remove_recipe(model, user.id, recipe.id):
                 return Response(
                     status=status.HTTP_204_NO_CONTENT,
                 )
@@ -162,41 +248,101 @@ class RecipesViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+    def post_delete_recipes(self, request, model):
+        """Массовое добавление и удаление: {"recipes": [id, ...]}.
+        Уже добавленные и уже убранные рецепты пропускаются."""
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Повторы id убираются с сохранением порядка.
+        recipes = list(
+            {
+                recipe.id: recipe
+                for recipe in serializer.validated_data["recipes"]
+            }.values()
+        )
+        recipe_ids = [recipe.id for recipe in recipes]
+        if request.method == "POST":
+            added = add_recipes(model, request.user.id, recipe_ids)
+            serializer = ShoppingListFavoiriteSerializer(
+                [recipe for recipe in recipes if recipe.id in added],
+                many=True,
+            )
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        remove_recipes(model, request.user.id, recipe_ids)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(
         methods=["POST", "DELETE"],
         detail=True,
-        permission_class=(IsAuthenticated,),
+        permission_classes=(IsAuthenticated,),
     )
     def favorite(self, request, **kwargs):
         return self.post_delete_recipe(request, kwargs.pop("pk"), Favorite)
 
+    @action(
+        methods=["POST", "DELETE"],
+        detail=False,
+        url_path="favorite",
+        url_name="favorite-bulk",
+        permission_classes=(IsAuthenticated,),
+    )
+    def favorite_bulk(self, request):
+        return self.post_delete_recipes(request, Favorite)
+
     @action(
         methods=["POST", "DELETE"],
         detail=True,
-        permission_class=(IsAuthenticated,),
+        permission_classes=(IsAuthenticated,),
     )
     def shopping_cart(self, request, **kwargs):
         return self.post_delete_recipe(request, kwargs.pop("pk"), ShoppingCart)
 
-    @action(methods=["GET"], detail=False, permission_class=(IsAuthenticated,))
+    @action(
+        methods=["POST", "DELETE"],
+        detail=False,
+        url_path="shopping_cart",
+        url_name="shopping-cart-bulk",
+        permission_classes=(IsAuthenticated,),
+    )
+    def shopping_cart_bulk(self, request):
+        return self.post_delete_recipes(request, ShoppingCart)
+
+    @action(
+        methods=["GET"],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            ShoppingCartTextRenderer,
+            ShoppingCartCSVRenderer,
+            JSONRenderer,
+        ),
+    )
     def download_shopping_cart(self, request):
-        ingredients = IngredientInRecipe.objects.select_related(
-            "recipe", "ingredient"
-        )
-        ingredients = ingredients.filter(
-            recipe__shopping_recipes__user=request.user
+        ingredients = ShoppingCartIngredient.objects.filter(
+            user=request.user
         )
         ingredients = ingredients.values(
-            "ingredient__name", "ingredient__measurement_unit"
+            "ingredient__name",
+            "ingredient__measurement_unit",
+            amount_sum=F("amount"),
         )
-        ingredients = ingredients.annotate(amount_sum=Sum("amount"))
         ingredients = ingredients.order_by("ingredient__name")
-        shopping_list = create_shopping_cart_file(ingredients)
-        response = HttpResponse(
-            shopping_list, content_type="text/plain; charset=utf8"
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            create_shopping_cart_file(ingredients.iterator(), renderer.format),
+            content_type=f"{renderer.media_type}; charset=utf-8",
         )
         response[
             "Content-Disposition"
-        ] = "attachment; filename='shopping_cart.txt'"
+        ] = f'attachment; filename="shopping_cart.{renderer.format}"'
 
         return response
+
+
+class DatabasePoolStatsView(APIView):
+    """Метрики пулов соединений с базой процесса, ответившего на запрос."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(pool_stats())
@@ -1,5 +1,6 @@
 #!/bin/bash
 
 python manage.py migrate --noinput
+python manage.py createcachetable
 python manage.py collectstatic --noinput
 exec "$@"
\ No newline at end of file
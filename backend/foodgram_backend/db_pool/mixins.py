@@ -0,0 +1,34 @@
+from functools import partial
+
+from foodgram_backend.db_pool.pool import PoolTimeout, get_pool
+
+
+class PooledDatabaseWrapperMixin:
+    """Соединения берутся из пула процесса, а close() возвращает их в
+    пул вместо закрытия. Параметры пула задаются ключом POOL настроек
+    базы; при CONN_MAX_AGE = 0 соединение возвращается в пул в конце
+    каждого запроса. pool_wait копит время ожидания соединения."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.pool_wait = 0.0
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(
+            self.alias, conn_params, self.settings_dict.get("POOL", {})
+        )
+        try:
+            connection, wait = self.pool.acquire(
+                partial(super().get_new_connection, conn_params)
+            )
+        except PoolTimeout as error:
+            raise self.Database.OperationalError(str(error)) from error
+        self.pool_wait += wait
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        reusable = not self.errors_occurred or self.is_usable()
+        self.pool.release(self.connection, reusable)
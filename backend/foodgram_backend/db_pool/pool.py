@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+DEFAULTS = {
+    "MAX_SIZE": 10,
+    "TIMEOUT": 5.0,
+    "HEALTH_CHECK_INTERVAL": 30.0,
+    "MAX_LIFETIME": 3600.0,
+}
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """Пул соединений процесса, общий для всех его потоков. Открывает не
+    больше max_size соединений; поток, которому соединения не хватило,
+    ждёт не дольше timeout. Соединение, простоявшее дольше
+    health_check_interval, перед выдачей проверяется запросом SELECT 1,
+    а старше max_lifetime закрывается при возврате."""
+
+    def __init__(
+        self, max_size, timeout, health_check_interval, max_lifetime
+    ):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.max_lifetime = max_lifetime
+        self.pid = os.getpid()
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.created = {}
+        self.size = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.connects = 0
+        self.discarded = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def reserve(self):
+        """Свободное соединение из пула или None, если можно открыть
+        новое. Ждёт освобождения, пока пул заполнен."""
+        deadline = time.monotonic() + self.timeout
+        with self.condition:
+            self.waiting += 1
+            try:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f"Нет свободного соединения за {self.timeout} с, "
+                            f"занято {self.size} из {self.max_size}."
+                        )
+                    self.condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            if self.idle:
+                return self.idle.pop()
+            self.size += 1
+            return None
+
+    def acquire(self, connect):
+        """Выдаёт соединение и время ожидания в секундах. connect
+        открывает новое соединение, когда свободных нет."""
+        started = time.monotonic()
+        entry = self.reserve()
+        wait = time.monotonic() - started
+        try:
+            if entry is not None:
+                connection, last_used = entry
+                if time.monotonic() - last_used < (
+                    self.health_check_interval
+                ) or self.ping(connection):
+                    return self.checked_out(connection, wait)
+                self.forget(connection)
+                close_quietly(connection)
+            connection = connect()
+        except BaseException:
+            self.free_slot()
+            raise
+        with self.condition:
+            self.connects += 1
+            self.created[id(connection)] = time.monotonic()
+        return self.checked_out(connection, wait)
+
+    def checked_out(self, connection, wait):
+        with self.condition:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+        return connection, wait
+
+    def release(self, connection, reusable=True):
+        """Возвращает соединение в пул. Незавершённая транзакция
+        откатывается; сломанное или слишком старое соединение
+        закрывается."""
+        created = self.created.get(id(connection), 0)
+        if reusable and time.monotonic() - created < self.max_lifetime:
+            try:
+                connection.rollback()
+            except Exception:
+                reusable = False
+        else:
+            reusable = False
+        if not reusable:
+            self.forget(connection)
+            close_quietly(connection)
+            self.free_slot()
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def ping(self, connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+            connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def forget(self, connection):
+        with self.condition:
+            self.created.pop(id(connection), None)
+            self.discarded += 1
+
+    def free_slot(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def stats(self):
+        with self.condition:
+            return {
+                "max_size": self.max_size,
+                "size": self.size,
+                "in_use": self.size - len(self.idle),
+                "idle": len(self.idle),
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "discarded": self.discarded,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(
+                    self.wait_total * 1000 / max(self.checkouts, 1), 3
+                ),
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+            }
+
+
+def get_pool(alias, conn_params, options):
+    """Пул для базы alias с параметрами conn_params. После fork воркера
+    создаётся новый пул: соединения родителя не переиспользуются."""
+    key = (alias, repr(sorted(conn_params.items())))
+    pool = pools.get(key)
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with pools_lock:
+        pool = pools.get(key)
+        if pool is None or pool.pid != os.getpid():
+            settings = {**DEFAULTS, **options}
+            pool = pools[key] = ConnectionPool(
+                max_size=settings["MAX_SIZE"],
+                timeout=settings["TIMEOUT"],
+                health_check_interval=settings["HEALTH_CHECK_INTERVAL"],
+                max_lifetime=settings["MAX_LIFETIME"],
+            )
+    return pool
+
+
+def pool_stats():
+    """Метрики пулов текущего процесса по псевдонимам баз."""
+    return {
+        alias: {"pid": pool.pid, **pool.stats()}
+        for (alias, _), pool in list(pools.items())
+        if pool.pid == os.getpid()
+    }
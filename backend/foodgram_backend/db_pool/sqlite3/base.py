@@ -0,0 +1,7 @@
+from django.db.backends.sqlite3 import base
+
+from foodgram_backend.db_pool.mixins import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    pass
@@ -10,7 +10,11 @@ DEBUG = os.getenv("DEBUG", False).lower() == "true"
 
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "").split(",")
 
-CSRF_TRUSTED_ORIGINS = os.getenv("CSRF_TRUSTED_ORIGINS", "").split(",")
+CSRF_TRUSTED_ORIGINS = [
+    origin
+    for origin in os.getenv("CSRF_TRUSTED_ORIGINS", "").split(",")
+    if origin
+]
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -26,6 +30,7 @@ INSTALLED_APPS = [
     "user.apps.UserConfig",
     "recipes.apps.RecipesConfig",
     "api.apps.ApiConfig",
+    "jobs.apps.JobsConfig",
 ]
 
 MIDDLEWARE = [
@@ -34,6 +39,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "api.middleware.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -58,17 +64,82 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "foodgram_backend.wsgi.application"
 
+DB_POOL = os.getenv("DB_POOL", "").lower() == "true"
+
+# postgresql или sqlite3 — для запуска и тестов без PostgreSQL.
+DB_ENGINE = os.getenv("DB_ENGINE", "postgresql")
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": (
+            f"foodgram_backend.db_pool.{DB_ENGINE}"
+            if DB_POOL
+            else f"django.db.backends.{DB_ENGINE}"
+        ),
         "NAME": os.getenv("POSTGRES_DB", "django"),
         "USER": os.getenv("POSTGRES_USER", "django"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
         "HOST": os.getenv("DB_HOST", ""),
         "PORT": os.getenv("DB_PORT", 5432),
+        # С пулом соединение возвращается в пул в конце каждого запроса.
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", 0)),
+        "CONN_HEALTH_CHECKS": True,
+        "POOL": {
+            "MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", 5)),
+            "HEALTH_CHECK_INTERVAL": float(
+                os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", 30)
+            ),
+            "MAX_LIFETIME": float(os.getenv("DB_POOL_MAX_LIFETIME", 3600)),
+        },
     }
 }
 
+if DB_ENGINE == "sqlite3":
+    DATABASES["default"]["NAME"] = BASE_DIR / os.getenv("DB_NAME", "db.sqlite3")
+    # Реплика — второй файл SQLite, в который копируется основной. В
+    # тестах это отдельная база, её заполняет api.tests.test_replica.
+    if os.getenv("DB_REPLICA_NAME"):
+        DATABASES["replica"] = {
+            **DATABASES["default"],
+            "NAME": BASE_DIR / os.getenv("DB_REPLICA_NAME"),
+        }
+elif os.getenv("DB_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("DB_REPLICA_HOST"),
+        "PORT": os.getenv("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["api.db_router.ReplicaRouter"]
+
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 5))
+
+# Кеш должен быть общим для всех процессов: в нём хранятся поколения
+# данных, по которым сбрасываются кеш списка рецептов и снимки
+# справочников, и закрепление пользователей за основной базой. Изменения
+# из воркера, команд управления и других процессов gunicorn видны только
+# через общий кеш. По умолчанию это таблица в основной базе
+# (manage.py createcachetable), при заданном REDIS_URL — Redis. Страницы
+# списка рецептов кешируются только в Redis или memcached: с таблицей в
+# базе попадание обходится дороже, чем сборка страницы.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -131,3 +202,45 @@ DJOSER = {
 }
 
 PAGE_SIZE = 10
+
+RECIPE_LIST_CACHE_TIMEOUT = int(os.getenv("RECIPE_LIST_CACHE_TIMEOUT", 300))
+
+INGREDIENT_INDEX_TTL = int(os.getenv("INGREDIENT_INDEX_TTL", 300))
+
+MAX_IMAGE_UPLOAD_SIZE = int(os.getenv("MAX_IMAGE_UPLOAD_SIZE", 10 * 1024**2))
+MAX_IMAGE_SIDE = int(os.getenv("MAX_IMAGE_SIDE", 8000))
+IMAGE_RENDITION_FORMAT = os.getenv("IMAGE_RENDITION_FORMAT", "WEBP")
+IMAGE_PROCESSING_ASYNC = (
+    os.getenv("IMAGE_PROCESSING_ASYNC", "").lower() == "true"
+)
+
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "").lower() == "true"
+
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "").lower() == "true"
+SQL_INSTRUMENTATION_SLOW_MS = float(
+    os.getenv("SQL_INSTRUMENTATION_SLOW_MS", 500)
+)
+SQL_INSTRUMENTATION_SAMPLE_RATE = float(
+    os.getenv("SQL_INSTRUMENTATION_SAMPLE_RATE", 1.0)
+)
+SQL_INSTRUMENTATION_REPEAT_THRESHOLD = int(
+    os.getenv("SQL_INSTRUMENTATION_REPEAT_THRESHOLD", 5)
+)
+
+if SQL_INSTRUMENTATION:
+    MIDDLEWARE.insert(0, "api.middleware.SQLInstrumentationMiddleware")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api.sql": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
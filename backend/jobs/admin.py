@@ -0,0 +1,25 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "task",
+        "status",
+        "attempts",
+        "run_after",
+        "updated",
+    )
+    list_filter = (
+        "task",
+        "status",
+    )
+    readonly_fields = ("created", "updated")
+    actions = ("requeue",)
+
+    @admin.action(description="Вернуть в очередь")
+    def requeue(self, request, queryset):
+        queryset.update(status=Job.PENDING, attempts=0)
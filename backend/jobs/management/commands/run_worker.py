@@ -0,0 +1,66 @@
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.core.management import BaseCommand
+from django.db import connections
+
+from jobs.registry import claim_jobs, run_job
+
+
+def run_job_in_process(job_id):
+    try:
+        return run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Runs background jobs from the database queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="Size of the process pool, 0 runs jobs in this process",
+        )
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when the queue is empty",
+        )
+
+    def handle(self, *args, processes, poll_interval, once, **kwargs):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if not processes:
+            self.loop(partial(map, run_job), 1, poll_interval, once)
+            return
+        # Дочерние процессы не должны наследовать открытые соединения.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            self.loop(
+                partial(pool.map, run_job_in_process),
+                processes,
+                poll_interval,
+                once,
+            )
+
+    def stop(self, *args):
+        self.running = False
+
+    def loop(self, run, batch, poll_interval, once):
+        while self.running:
+            job_ids = claim_jobs(batch)
+            if not job_ids:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+            for job_id, status in zip(job_ids, run(job_ids)):
+                self.stdout.write(f"Job {job_id}: {status}")
@@ -0,0 +1,62 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Ошибка"),
+    )
+
+    task = models.CharField(
+        verbose_name="Задача",
+        help_text="Имя зарегистрированной задачи",
+        max_length=200,
+    )
+    payload = models.JSONField(
+        verbose_name="Аргументы",
+        default=dict,
+    )
+    status = models.CharField(
+        verbose_name="Статус",
+        max_length=20,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name="Попыток",
+        default=0,
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name="Максимум попыток",
+        default=3,
+    )
+    error = models.TextField(
+        verbose_name="Ошибка",
+        blank=True,
+    )
+    run_after = models.DateTimeField(
+        verbose_name="Не раньше",
+        default=timezone.now,
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        ordering = ("run_after", "id")
+        indexes = [
+            models.Index(
+                fields=["status", "run_after"], name="job_status_run_after"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.task} #{self.id} ({self.status})"
@@ -0,0 +1,99 @@
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+TASKS = {}
+FAILURE_HANDLERS = {}
+RETRY_DELAY = timedelta(seconds=30)
+# Задача, которая выполняется дольше, считается брошенной упавшим
+# воркером и снова забирается из очереди.
+LEASE_TIMEOUT = timedelta(minutes=10)
+
+
+def task(name, on_failure=None):
+    """Регистрирует функцию как фоновую задачу с именем name.
+    on_failure вызывается с теми же аргументами, когда задача
+    окончательно не удалась."""
+
+    def decorator(function):
+        TASKS[name] = function
+        if on_failure is not None:
+            FAILURE_HANDLERS[name] = on_failure
+        return function
+
+    return decorator
+
+
+def enqueue(name, **payload):
+    """Ставит задачу в очередь после фиксации текущей транзакции."""
+    if name not in TASKS:
+        raise KeyError(f"Unknown task {name}")
+    job = Job(task=name, payload=payload)
+    transaction.on_commit(job.save)
+    return job
+
+
+def claim_jobs(limit):
+    """Забирает из очереди до limit готовых к запуску задач, в том числе
+    зависшие в статусе running дольше LEASE_TIMEOUT. Строки,
+    заблокированные другим воркером, пропускаются. Попытка засчитывается
+    при захвате, поэтому задача, роняющая воркер, не повторяется
+    бесконечно."""
+    now = timezone.now()
+    ready = Q(status=Job.PENDING, run_after__lte=now) | Q(
+        status=Job.RUNNING, updated__lt=now - LEASE_TIMEOUT
+    )
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(ready)
+            .values_list("id", flat=True)[:limit]
+        )
+        claimed = []
+        for job_id in ids:
+            if Job.objects.filter(ready, id=job_id).update(
+                status=Job.RUNNING, attempts=F("attempts") + 1, updated=now
+            ):
+                claimed.append(job_id)
+    return claimed
+
+
+def fail_job(job):
+    job.status = Job.FAILED
+    handler = FAILURE_HANDLERS.get(job.task)
+    if handler is None:
+        return
+    try:
+        handler(**job.payload)
+    except Exception:
+        job.error += traceback.format_exc()
+
+
+def run_job(job_id):
+    """Выполняет задачу. Упавшая задача возвращается в очередь с
+    задержкой, пока не исчерпает max_attempts."""
+    job = Job.objects.get(id=job_id)
+    if job.attempts > job.max_attempts:
+        job.error = "Воркер не завершил задачу, попытки исчерпаны."
+        fail_job(job)
+    else:
+        try:
+            TASKS[job.task](**job.payload)
+        except Exception:
+            job.error = traceback.format_exc()
+            if job.attempts < job.max_attempts:
+                job.status = Job.PENDING
+                job.run_after = timezone.now() + RETRY_DELAY * job.attempts
+            else:
+                fail_job(job)
+        else:
+            job.status = Job.DONE
+            job.error = ""
+    job.save(update_fields=["status", "error", "run_after", "updated"])
+    return job.status
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import (
+    FAILURE_HANDLERS,
+    LEASE_TIMEOUT,
+    TASKS,
+    claim_jobs,
+    run_job,
+)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.run = mock.Mock()
+        self.on_failure = mock.Mock()
+        patcher = mock.patch.dict(TASKS, {"tests.task": self.run})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(
+            FAILURE_HANDLERS, {"tests.task": self.on_failure}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_job(self, **kwargs):
+        return Job.objects.create(
+            task="tests.task", payload={"value": 1}, **kwargs
+        )
+
+    def make_stale(self, job):
+        Job.objects.filter(id=job.id).update(
+            updated=timezone.now() - LEASE_TIMEOUT * 2
+        )
+
+    def test_claim_counts_attempt(self):
+        job = self.create_job()
+        self.assertEqual(claim_jobs(10), [job.id])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.RUNNING, 1))
+        self.assertEqual(claim_jobs(10), [])
+
+    def test_stale_running_job_is_reclaimed(self):
+        job = self.create_job(status=Job.RUNNING, attempts=1)
+        self.assertEqual(claim_jobs(10), [])
+        self.make_stale(job)
+        self.assertEqual(claim_jobs(10), [job.id])
+        self.assertEqual(run_job(job.id), Job.DONE)
+        self.run.assert_called_once_with(value=1)
+
+    def test_stale_job_without_attempts_left_fails(self):
+        job = self.create_job(status=Job.RUNNING, attempts=3)
+        self.make_stale(job)
+        self.assertEqual(claim_jobs(10), [job.id])
+        self.assertEqual(run_job(job.id), Job.FAILED)
+        self.run.assert_not_called()
+        self.on_failure.assert_called_once_with(value=1)
+
+    def test_failure_handler_runs_after_last_attempt(self):
+        self.run.side_effect = ValueError
+        job = self.create_job()
+        for attempt in range(job.max_attempts):
+            Job.objects.filter(id=job.id).update(run_after=timezone.now())
+            self.assertEqual(claim_jobs(10), [job.id])
+            status = run_job(job.id)
+            if attempt < job.max_attempts - 1:
+                self.assertEqual(status, Job.PENDING)
+                self.on_failure.assert_not_called()
+        self.assertEqual(status, Job.FAILED)
+        self.on_failure.assert_called_once_with(value=1)
@@ -1,5 +1,9 @@
+from collections import defaultdict
+
 from django.contrib import admin
+from django.db import transaction
 
+from recipes.counters import change_counter
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -8,6 +12,10 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from recipes.shopping_cart import track_recipe_amounts
+from recipes.tasks import schedule_renditions
+from recipes.user_lists import recipes_added, recipes_removed
+from user.models import User
 
 
 @admin.register(Tag)
@@ -36,12 +44,35 @@ class IngredientsAdmin(admin.ModelAdmin):
 
 @admin.register(IngredientInRecipe)
 class AmountIngredientAdmin(admin.ModelAdmin):
+    """Изменения состава рецепта переносятся в списки покупок тех, у кого
+    рецепт в корзине."""
+
     list_display = (
         "ingredient",
         "recipe",
         "amount",
     )
 
+    def save_model(self, request, obj, form, change):
+        recipe_ids = {obj.recipe_id}
+        if change:
+            recipe_ids.update(
+                self.model.objects.filter(pk=obj.pk).values_list(
+                    "recipe_id", flat=True
+                )
+            )
+        with transaction.atomic(), track_recipe_amounts(recipe_ids):
+            super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic(), track_recipe_amounts([obj.recipe_id]):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        recipe_ids = set(queryset.values_list("recipe_id", flat=True))
+        with transaction.atomic(), track_recipe_amounts(recipe_ids):
+            super().delete_queryset(request, queryset)
+
 
 class IngredientInRecipesAmountInline(admin.TabularInline):
     model = IngredientInRecipe
@@ -79,12 +110,35 @@ class RecipesAdmin(admin.ModelAdmin):
             .select_related("author")
         )
 
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            old_author_id = None
+            if change and "author" in form.changed_data:
+                old_author_id = (
+                    Recipe.objects.filter(pk=obj.pk)
+                    .values_list("author_id", flat=True)
+                    .first()
+                )
+            super().save_model(request, obj, form, change)
+            # Сигнал post_save меняет счётчик только у новых рецептов.
+            if old_author_id not in (None, obj.author_id):
+                change_counter(User, old_author_id, "recipes_count", False)
+                change_counter(User, obj.author_id, "recipes_count", True)
+        if "image" in form.changed_data:
+            schedule_renditions(obj)
+
+    def save_related(self, request, form, formsets, change):
+        with track_recipe_amounts([form.instance.pk]):
+            super().save_related(request, form, formsets, change)
+
     def get_in_favorites(self, obj):
-        return obj.favorite_recipes.count()
+        return obj.favorites_count
 
 
-@admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class UserRecipeListAdmin(admin.ModelAdmin):
+    """Избранное и корзина меняются без сигналов моделей, поэтому админка
+    сама обновляет зависящие от них счётчики и итоги списка покупок."""
+
     list_display = (
         "user",
         "recipe",
@@ -95,25 +149,41 @@ class FavoriteAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         return (
-            super(FavoriteAdmin, self)
+            super()
             .get_queryset(request)
             .select_related("user", "recipe")
         )
 
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            if change:
+                old = self.model.objects.get(pk=obj.pk)
+                recipes_removed(self.model, old.user_id, [old.recipe_id])
+            super().save_model(request, obj, form, change)
+            recipes_added(self.model, obj.user_id, [obj.recipe_id])
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            recipes_removed(self.model, obj.user_id, [obj.recipe_id])
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            by_user = defaultdict(list)
+            for user_id, recipe_id in queryset.values_list(
+                "user_id", "recipe_id"
+            ):
+                by_user[user_id].append(recipe_id)
+            super().delete_queryset(request, queryset)
+            for user_id, recipe_ids in by_user.items():
+                recipes_removed(self.model, user_id, recipe_ids)
 
-@admin.register(ShoppingCart)
-class BuyListAdmin(admin.ModelAdmin):
-    list_display = (
-        "user",
-        "recipe",
-    )
-    list_filter = ("user",)
-    search_fields = ("user", "recipe")
-    empty_value_display = "-пусто-"
 
-    def get_queryset(self, request):
-        return (
-            super(BuyListAdmin, self)
-            .get_queryset(request)
-            .select_related("user", "recipe")
-        )
+@admin.register(Favorite)
+class FavoriteAdmin(UserRecipeListAdmin):
+    pass
+
+
+@admin.register(ShoppingCart)
+class BuyListAdmin(UserRecipeListAdmin):
+    pass
@@ -0,0 +1,65 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+GENERATION_KEY = "generation:{}"
+
+
+def _new_generation():
+    return time.time_ns()
+
+
+def get_generations(*names):
+    """Текущие поколения данных names. Ключ кеша, собранный из них,
+    устаревает сам, как только любое из поколений увеличивается."""
+    keys = [GENERATION_KEY.format(name) for name in names]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            value = _new_generation()
+            if not cache.add(key, value, timeout=None):
+                value = cache.get(key, value)
+            generations[key] = value
+    return tuple(generations[key] for key in keys)
+
+
+def bump_generation(*names):
+    """Делает недействительными все данные, закешированные по поколениям
+    names. Новое поколение записывается целиком и без срока жизни:
+    incr у DatabaseCache — неатомарные чтение и запись, которые к тому же
+    ставят ключу срок по умолчанию."""
+    cache.set_many(
+        {GENERATION_KEY.format(name): _new_generation() for name in names},
+        timeout=None,
+    )
+
+
+class PendingBumps:
+    """Поколения, которые нужно сбросить после фиксации транзакции."""
+
+    def __init__(self):
+        self.names = set()
+
+    def __call__(self):
+        bump_generation(*self.names)
+
+
+def bump_on_commit(*names, using=None):
+    """Сбрасывает поколения names после фиксации текущей транзакции.
+    Все изменения одной транзакции сбрасывают каждое поколение один раз:
+    имена собираются в общий набор с единственным on_commit."""
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        bump_generation(*names)
+        return
+    pending = getattr(connection, "pending_bumps", None)
+    # После отката транзакции или точки сохранения обработчик удаляется
+    # из run_on_commit вместе с набором, тогда нужен новый.
+    if pending is None or not any(
+        entry[1] is pending for entry in connection.run_on_commit
+    ):
+        pending = connection.pending_bumps = PendingBumps()
+        transaction.on_commit(pending, using=using)
+    pending.names.update(names)
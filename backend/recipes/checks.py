@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Поколения данных, по которым пересобираются снимки справочников
+    и сбрасывается кеш списка рецептов, должны быть видны всем
+    процессам."""
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Error(
+            f"Кеш {backend} не общий для процессов: изменения из воркера, "
+            "команд управления и других процессов не сбросят снимки "
+            "справочников и кеш списка рецептов.",
+            hint="Используйте DatabaseCache или RedisCache.",
+            id="recipes.E001",
+        )
+    ]
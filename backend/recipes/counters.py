@@ -0,0 +1,60 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from user.models import User
+
+
+def change_counter(model, pk, field, created):
+    """Атомарно меняет счётчик field у объекта model на единицу."""
+    queryset = model.objects.filter(pk=pk)
+    if created:
+        queryset.update(**{field: F(field) + 1})
+    else:
+        queryset.filter(**{f"{field}__gt": 0}).update(**{field: F(field) - 1})
+
+
+def count_subquery(model, field):
+    """Подзапрос с количеством строк model, ссылающихся через field на
+    объект внешнего запроса."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def reconcile_counter(model, counter, related_model, field, dry_run=False):
+    """Сверяет счётчик counter у model с фактическим количеством строк
+    related_model и исправляет расхождения. Возвращает число
+    исправленных объектов."""
+    actual = count_subquery(related_model, field)
+    drifted = model.objects.annotate(actual=actual).filter(
+        ~Q(**{counter: F("actual")})
+    )
+    if dry_run:
+        return drifted.count()
+    return model.objects.filter(
+        pk__in=drifted.values("pk")
+    ).update(**{counter: actual})
+
+
+def reconcile_counters(dry_run=False):
+    """Сверяет все денормализованные счётчики."""
+    return {
+        "recipes_count": reconcile_counter(
+            User, "recipes_count", Recipe, "author", dry_run
+        ),
+        "favorites_count": reconcile_counter(
+            Recipe, "favorites_count", Favorite, "recipe", dry_run
+        ),
+        "shopping_cart_count": reconcile_counter(
+            Recipe, "shopping_cart_count", ShoppingCart, "recipe", dry_run
+        ),
+    }
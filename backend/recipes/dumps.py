@@ -0,0 +1,66 @@
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+
+USER_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "password",
+    "date_joined",
+)
+HASH_PREFIX = "sha256:"
+HASHED_IMAGES_DIR = "recipes/"
+
+
+def file_hash(file):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(1024 * 1024), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hashed_path(media_dir, name):
+    return Path(media_dir) / name[:2] / name
+
+
+def export_image(image, media_dir):
+    """Копирует фотографию в media_dir под именем по хешу содержимого.
+    Одинаковые фотографии разных рецептов сохраняются один раз.
+    Если файла нет в хранилище, остаётся ссылка на исходное имя."""
+    if not image or media_dir is None:
+        return image.name
+    if not image.storage.exists(image.name):
+        return image.name
+    with image.open("rb") as file:
+        digest = file_hash(file)
+        name = digest + os.path.splitext(image.name)[1].lower()
+        path = hashed_path(media_dir, name)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            file.seek(0)
+            with open(path, "wb") as target:
+                shutil.copyfileobj(file, target)
+    return HASH_PREFIX + name
+
+
+def import_image(reference, media_dir, saved):
+    """Имя файла в хранилище для ссылки из выгрузки. Фотографии по хешу
+    сохраняются в хранилище один раз, saved запоминает сохранённые."""
+    if not reference.startswith(HASH_PREFIX):
+        return reference
+    name = reference[len(HASH_PREFIX):]
+    if name not in saved:
+        stored = HASHED_IMAGES_DIR + name
+        if not default_storage.exists(stored):
+            with open(hashed_path(media_dir, name), "rb") as file:
+                stored = default_storage.save(stored, File(file))
+        saved[name] = stored
+    return saved[name]
@@ -0,0 +1,141 @@
+import base64
+import binascii
+import os
+import uuid
+from contextlib import contextmanager
+from io import BytesIO
+from typing import NamedTuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+
+class PendingImage(NamedTuple):
+    """Фотография из запроса, которую декодирует фоновый воркер."""
+
+    ext: str
+    data: str
+
+
+RENDITIONS = {
+    "image_card": (480, 480),
+    "image_detail": (1200, 1200),
+}
+PENDING_IMAGES_DIR = "recipes/pending/"
+RENDITION_FORMATS = {
+    "WEBP": ("webp", {"quality": 80, "method": 4}),
+    "JPEG": ("jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def split_data_uri(data):
+    header, imgstr = data.split(";base64,")
+    ext = header.split("/")[-1]
+    if len(imgstr) * 3 // 4 > settings.MAX_IMAGE_UPLOAD_SIZE:
+        raise ValidationError("Размер изображения слишком велик.")
+    return ext, imgstr
+
+
+def decode_base64_image(data):
+    """Декодирует изображение из data URI. Размер данных проверяется
+    до декодирования base64, размеры картинки — по заголовку файла,
+    без декодирования пикселей."""
+    ext, imgstr = split_data_uri(data)
+    try:
+        content = base64.b64decode(imgstr)
+    except binascii.Error:
+        raise ValidationError("Некорректные данные изображения.")
+    check_image_dimensions(content)
+    return ContentFile(content, name="temp." + ext)
+
+
+def pending_image(data):
+    """Проверяет только размер data URI: декодирование и остальные
+    проверки выполнит фоновый воркер."""
+    return PendingImage(*split_data_uri(data))
+
+
+def store_pending_image(image):
+    """Сохраняет фотографию для воркера как есть, в base64. Возвращает
+    имя файла."""
+    return default_storage.save(
+        f"{PENDING_IMAGES_DIR}{uuid.uuid4().hex}.{image.ext}",
+        ContentFile(image.data.encode()),
+    )
+
+
+@contextmanager
+def pending_image_file(image):
+    """Сохраняет фотографию image на время блока и отдаёт имя файла
+    (None, если фотографии нет). Если блок, например транзакция с
+    рецептом, завершится ошибкой, файл удаляется: задачи для него не
+    будет."""
+    if image is None:
+        yield None
+        return
+    name = store_pending_image(image)
+    try:
+        yield name
+    except BaseException:
+        delete_pending_image(name)
+        raise
+
+
+def read_pending_image(name):
+    """Декодирует сохранённый store_pending_image файл. Файл удаляется
+    отдельно, после успешной обработки, чтобы повтор задачи мог
+    прочитать его снова."""
+    ext = name.rsplit(".", 1)[-1]
+    with default_storage.open(name, "rb") as file:
+        imgstr = file.read().decode()
+    return decode_base64_image(f"data:image/{ext};base64,{imgstr}")
+
+
+def delete_pending_image(name):
+    default_storage.delete(name)
+
+
+def check_image_dimensions(content):
+    try:
+        with Image.open(BytesIO(content)) as image:
+            width, height = image.size
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        raise ValidationError("Загрузите корректное изображение.")
+    if max(width, height) > settings.MAX_IMAGE_SIDE:
+        raise ValidationError(
+            "Сторона изображения не может превышать "
+            f"{settings.MAX_IMAGE_SIDE} пикселей."
+        )
+
+
+def render(image, size):
+    rendition = image.copy()
+    rendition.thumbnail(size, Image.LANCZOS)
+    file_format = settings.IMAGE_RENDITION_FORMAT
+    ext, options = RENDITION_FORMATS[file_format]
+    buffer = BytesIO()
+    rendition.save(buffer, file_format, **options)
+    return ext, buffer.getvalue()
+
+
+def create_renditions(recipe):
+    """Создаёт уменьшенные копии фотографии рецепта для карточек и
+    страницы рецепта и сохраняет их в полях RENDITIONS."""
+    largest = max(RENDITIONS.values())
+    with recipe.image.open("rb") as file, Image.open(file) as image:
+        image.draft("RGB", largest)
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        stem = os.path.splitext(os.path.basename(recipe.image.name))[0]
+        for field, size in RENDITIONS.items():
+            ext, content = render(image, size)
+            rendition = getattr(recipe, field)
+            if rendition:
+                rendition.delete(save=False)
+            rendition.save(
+                f"{stem}_{field}.{ext}", ContentFile(content), save=False
+            )
+    recipe.save(update_fields=list(RENDITIONS))
@@ -0,0 +1,199 @@
+import csv
+import io
+import json
+from functools import partial
+from itertools import islice
+from typing import NamedTuple
+
+from django.db import connection, transaction
+
+from recipes.models import Ingredient, Tag
+
+
+JSON_SEPARATORS = " \t\r\n,[]"
+
+
+class ImportSpec(NamedTuple):
+    """Описание справочника для импорта: поля файла, естественный ключ
+    и поля, обновляемые при совпадении ключа."""
+
+    model: type
+    fields: tuple
+    unique_fields: tuple
+    update_fields: tuple = ()
+
+
+SPECS = {
+    "ingredients": ImportSpec(
+        Ingredient,
+        ("name", "measurement_unit"),
+        ("name", "measurement_unit"),
+    ),
+    "tags": ImportSpec(
+        Tag,
+        ("name", "color", "slug"),
+        ("slug",),
+        ("name", "color"),
+    ),
+}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def read_csv(file):
+    yield from csv.DictReader(file)
+
+
+def read_json(file, chunk_size=64 * 1024):
+    """Объекты из JSON-массива или NDJSON по одному, без загрузки всего
+    файла в память."""
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+    while True:
+        while True:
+            while (
+                position < len(buffer) and buffer[position] in JSON_SEPARATORS
+            ):
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            buffer, position = file.read(chunk_size), 0
+            eof = not buffer
+        if position >= len(buffer):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item
+
+
+READERS = {
+    "csv": read_csv,
+    "json": read_json,
+    "ndjson": read_json,
+}
+
+
+def normalize(spec, rows):
+    for row in rows:
+        yield {field: str(row[field]).strip() for field in spec.fields}
+
+
+def bulk_upsert(spec, rows):
+    """Запасной путь через ORM для прочих баз."""
+    options = {"ignore_conflicts": True}
+    if spec.update_fields:
+        options = {
+            "update_conflicts": True,
+            "unique_fields": spec.unique_fields,
+            "update_fields": spec.update_fields,
+        }
+    unique_rows = {
+        tuple(row[field] for field in spec.unique_fields): row
+        for row in rows
+    }
+    spec.model.objects.bulk_create(
+        [spec.model(**row) for row in unique_rows.values()], **options
+    )
+
+
+def conflict_sql(spec):
+    columns = ", ".join(spec.unique_fields)
+    if not spec.update_fields:
+        return f"ON CONFLICT ({columns}) DO NOTHING"
+    updates = ", ".join(
+        f"{field} = EXCLUDED.{field}" for field in spec.update_fields
+    )
+    return f"ON CONFLICT ({columns}) DO UPDATE SET {updates}"
+
+
+class InsertUpserter:
+    """INSERT ... ON CONFLICT через executemany, без построения моделей и
+    компиляции запросов ORM на каждую пачку."""
+
+    def __init__(self, spec, cursor):
+        self.spec = spec
+        self.cursor = cursor
+        columns = ", ".join(spec.fields)
+        values = ", ".join(["%s"] * len(spec.fields))
+        self.sql = (
+            f"INSERT INTO {spec.model._meta.db_table} ({columns}) "
+            f"VALUES ({values}) {conflict_sql(spec)}"
+        )
+
+    def __call__(self, rows):
+        self.cursor.executemany(
+            self.sql,
+            [[row[field] for field in self.spec.fields] for row in rows],
+        )
+
+
+class CopyUpserter:
+    """Загружает пачки через COPY во временную таблицу и переносит их
+    одним INSERT ... ON CONFLICT. Только для Postgres с psycopg2."""
+
+    staging = "import_staging"
+
+    def __init__(self, spec, cursor):
+        self.spec = spec
+        self.cursor = cursor
+        table = spec.model._meta.db_table
+        columns = ", ".join(spec.fields)
+        unique = ", ".join(spec.unique_fields)
+        self.copy_sql = (
+            f"COPY {self.staging} ({columns}) FROM STDIN WITH (FORMAT csv)"
+        )
+        # DISTINCT ON: ON CONFLICT DO UPDATE не принимает повтор ключа.
+        self.insert_sql = (
+            f"INSERT INTO {table} ({columns}) "
+            f"SELECT DISTINCT ON ({unique}) {columns} FROM {self.staging} "
+            f"{conflict_sql(spec)}"
+        )
+        cursor.execute(
+            f"CREATE TEMP TABLE {self.staging} ON COMMIT DROP AS "
+            f"SELECT {columns} FROM {table} WITH NO DATA"
+        )
+
+    def __call__(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(
+            [row[field] for field in self.spec.fields] for row in rows
+        )
+        buffer.seek(0)
+        self.cursor.cursor.copy_expert(self.copy_sql, buffer)
+        self.cursor.execute(self.insert_sql)
+        self.cursor.execute(f"TRUNCATE {self.staging}")
+
+
+def get_upserter(spec, cursor, use_copy):
+    if connection.vendor not in ("postgresql", "sqlite"):
+        return partial(bulk_upsert, spec)
+    if use_copy and hasattr(cursor.cursor, "copy_expert"):
+        return CopyUpserter(spec, cursor)
+    return InsertUpserter(spec, cursor)
+
+
+def upsert_rows(spec, rows, batch_size, use_copy=True, progress=None):
+    """Вставляет или обновляет строки справочника пачками по batch_size
+    в одной транзакции. Повторный запуск с теми же данными ничего не
+    меняет. Возвращает число обработанных строк."""
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        upsert = get_upserter(spec, cursor, use_copy)
+        for batch in chunked(normalize(spec, rows), batch_size):
+            upsert(batch)
+            total += len(batch)
+            if progress is not None:
+                progress(total)
+    return total
@@ -0,0 +1,68 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from recipes.models import Ingredient
+
+
+class IngredientPrefixIndex:
+    """Индекс ингредиентов в памяти процесса для автодополнения.
+    Строится при первом обращении, сбрасывается сигналами моделей и
+    перестраивается не реже, чем раз в INGREDIENT_INDEX_TTL секунд,
+    чтобы остальные воркеры тоже увидели изменения.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._built_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def _expired(self):
+        ttl = getattr(settings, "INGREDIENT_INDEX_TTL", None)
+        return ttl is not None and time.monotonic() - self._built_at > ttl
+
+    def _build(self):
+        with self._lock:
+            if self._snapshot is not None and not self._expired():
+                return self._snapshot
+            ingredients = sorted(
+                Ingredient.objects.all(),
+                key=lambda item: (item.name.lower(), item.id),
+            )
+            keys = [item.name.lower() for item in ingredients]
+            self._snapshot = keys, ingredients
+            self._built_at = time.monotonic()
+            return self._snapshot
+
+    def _get_snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None or self._expired():
+            snapshot = self._build()
+        return snapshot
+
+    def search(self, query):
+        """Ингредиенты, название которых начинается с query, а за ними
+        те, в названии которых query встречается в середине."""
+        keys, ingredients = self._get_snapshot()
+        query = query.strip().lower()
+        if not query:
+            return list(ingredients)
+        start = stop = bisect_left(keys, query)
+        while stop < len(keys) and keys[stop].startswith(query):
+            stop += 1
+        substring = [
+            ingredient
+            for position, ingredient in enumerate(ingredients)
+            if (position < start or position >= stop)
+            and query in keys[position]
+        ]
+        return ingredients[start:stop] + substring
+
+
+ingredient_index = IngredientPrefixIndex()
@@ -0,0 +1,32 @@
+from django.core.management import BaseCommand
+
+from recipes.images import create_renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Creates card and detail renditions of recipe images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebuild renditions that already exist too",
+        )
+
+    def handle(self, *args, all=False, **kwargs):
+        recipes = Recipe.objects.exclude(image="")
+        if not all:
+            recipes = recipes.filter(image_card="")
+        built = failed = 0
+        for recipe in recipes.iterator(chunk_size=100):
+            try:
+                create_renditions(recipe)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f"Recipe {recipe.id}: {error}")
+            else:
+                built += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Создано копий: {built}, ошибок: {failed}")
+        )
@@ -0,0 +1,96 @@
+import json
+import sys
+
+from django.core.management import BaseCommand
+from django.db.models import Prefetch
+
+from recipes.dumps import USER_FIELDS, export_image
+from recipes.models import Favorite, IngredientInRecipe, Recipe, ShoppingCart
+from user.models import Follow, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams users, recipes with ingredients and tags, follows, "
+        "favorites and shopping carts as NDJSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", help="File to write, stdout by default"
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--media-dir",
+            help="Copy recipe images here, named by content hash",
+        )
+
+    def handle(self, *args, output, chunk_size, media_dir, **kwargs):
+        file = open(output, "w", encoding="utf-8") if output else sys.stdout
+        # isoformat без усечения микросекунд, в отличие от DjangoJSONEncoder.
+        encoder = json.JSONEncoder(
+            ensure_ascii=False, default=lambda value: value.isoformat()
+        )
+        counts = {}
+        try:
+            for record_type, records in self.records(chunk_size, media_dir):
+                count = 0
+                for record in records:
+                    record["type"] = record_type
+                    file.write(encoder.encode(record) + "\n")
+                    count += 1
+                counts[record_type] = count
+        finally:
+            if output:
+                file.close()
+        self.stderr.write(
+            ", ".join(f"{name}: {count}" for name, count in counts.items())
+        )
+
+    def records(self, chunk_size, media_dir):
+        yield "user", User.objects.order_by("id").values(
+            *USER_FIELDS
+        ).iterator(chunk_size=chunk_size)
+        yield "recipe", self.recipes(chunk_size, media_dir)
+        yield "follow", Follow.objects.order_by("id").values(
+            "user", "author"
+        ).iterator(chunk_size=chunk_size)
+        for record_type, model in (
+            ("favorite", Favorite),
+            ("shopping_cart", ShoppingCart),
+        ):
+            yield record_type, model.objects.order_by("id").values(
+                "user", "recipe"
+            ).iterator(chunk_size=chunk_size)
+
+    def recipes(self, chunk_size, media_dir):
+        recipes = (
+            Recipe.objects.order_by("id")
+            .prefetch_related(
+                "tags",
+                Prefetch(
+                    "recipe",
+                    IngredientInRecipe.objects.select_related("ingredient"),
+                ),
+            )
+            .iterator(chunk_size=chunk_size)
+        )
+        for recipe in recipes:
+            yield {
+                "id": recipe.id,
+                "author": recipe.author_id,
+                "name": recipe.name,
+                "text": recipe.text,
+                "cooking_time": recipe.cooking_time,
+                "pub_date": recipe.pub_date,
+                "image": export_image(recipe.image, media_dir),
+                "tags": [tag.slug for tag in recipe.tags.all()],
+                "ingredients": [
+                    [
+                        item.ingredient.name,
+                        item.ingredient.measurement_unit,
+                        item.amount,
+                    ]
+                    for item in recipe.recipe.all()
+                ],
+            }
@@ -0,0 +1,191 @@
+import json
+import time
+from collections import Counter
+from functools import partial
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import transaction
+
+from recipes.cache import bump_generation
+from recipes.counters import reconcile_counters
+from recipes.dumps import USER_FIELDS, import_image
+from recipes.importers import chunked
+from recipes.indexes import ingredient_index
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from user.models import Follow, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads an export_recipes NDJSON dump, remapping user and recipe ids"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--media-dir",
+            help="Directory with images exported by content hash",
+        )
+
+    def handle(self, *args, file, batch_size, media_dir, **kwargs):
+        self.media_dir = media_dir
+        self.users = {}
+        self.recipes = {}
+        self.saved_images = {}
+        self.tags = dict(Tag.objects.values_list("slug", "id"))
+        self.skipped = Counter()
+        loaders = {
+            "user": self.load_users,
+            "recipe": self.load_recipes,
+            "follow": partial(
+                self.load_relations, Follow, "author", self.users
+            ),
+            "favorite": partial(
+                self.load_relations, Favorite, "recipe", self.recipes
+            ),
+            "shopping_cart": partial(
+                self.load_relations, ShoppingCart, "recipe", self.recipes
+            ),
+        }
+        started = time.monotonic()
+        with open(file, encoding="utf-8") as lines, transaction.atomic():
+            records = (json.loads(line) for line in lines if line.strip())
+            for record_type, group in groupby(records, itemgetter("type")):
+                if record_type not in loaders:
+                    raise CommandError(f"Unknown record type {record_type}")
+                total = 0
+                for batch in chunked(group, batch_size):
+                    loaders[record_type](batch)
+                    total += len(batch)
+                self.stdout.write(f"{record_type}: {total} records")
+            reconcile_counters()
+            call_command("rebuild_shopping_totals", stdout=self.stdout)
+        ingredient_index.invalidate()
+        bump_generation("recipes", "users", "ingredients")
+        for name, count in self.skipped.items():
+            self.stdout.write(self.style.WARNING(f"Skipped {name}: {count}"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Импорт завершён за {time.monotonic() - started:.1f}s"
+            )
+        )
+
+    def load_users(self, batch):
+        """Пользователи сопоставляются по email, недостающие создаются."""
+        existing = dict(
+            User.objects.filter(
+                email__in=[record["email"] for record in batch]
+            ).values_list("email", "id")
+        )
+        new = [record for record in batch if record["email"] not in existing]
+        created = User.objects.bulk_create(
+            User(**{field: record[field] for field in USER_FIELDS[1:]})
+            for record in new
+        )
+        for record in batch:
+            if record["email"] in existing:
+                self.users[record["id"]] = existing[record["email"]]
+        for record, user in zip(new, created):
+            self.users[record["id"]] = user.id
+
+    def resolve_ingredients(self, keys):
+        """{(название, единица): id}; недостающие ингредиенты создаются."""
+
+        def find():
+            return {
+                (name, unit): pk
+                for pk, name, unit in Ingredient.objects.filter(
+                    name__in={name for name, _ in keys}
+                ).values_list("id", "name", "measurement_unit")
+                if (name, unit) in keys
+            }
+
+        found = find()
+        if len(found) < len(keys):
+            Ingredient.objects.bulk_create(
+                [
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in keys - found.keys()
+                ],
+                ignore_conflicts=True,
+            )
+            found = find()
+        return found
+
+    def load_recipes(self, batch):
+        orphans = [
+            record for record in batch if record["author"] not in self.users
+        ]
+        if orphans:
+            self.skipped["recipes without author"] += len(orphans)
+            batch = [
+                record for record in batch if record["author"] in self.users
+            ]
+        ingredients = self.resolve_ingredients(
+            {
+                (name, unit)
+                for record in batch
+                for name, unit, _ in record["ingredients"]
+            }
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author_id=self.users[record["author"]],
+                name=record["name"],
+                text=record["text"],
+                cooking_time=record["cooking_time"],
+                image=import_image(
+                    record["image"], self.media_dir, self.saved_images
+                ),
+            )
+            for record in batch
+        )
+        tags = []
+        items = []
+        for record, recipe in zip(batch, recipes):
+            self.recipes[record["id"]] = recipe.id
+            # pub_date с auto_now_add: исходная дата ставится отдельно.
+            recipe.pub_date = record["pub_date"]
+            for slug in record["tags"]:
+                if slug not in self.tags:
+                    self.skipped["unknown tags"] += 1
+                    continue
+                tags.append(
+                    Recipe.tags.through(
+                        recipe_id=recipe.id, tag_id=self.tags[slug]
+                    )
+                )
+            items.extend(
+                IngredientInRecipe(
+                    recipe_id=recipe.id,
+                    ingredient_id=ingredients[name, unit],
+                    amount=amount,
+                )
+                for name, unit, amount in record["ingredients"]
+            )
+        Recipe.objects.bulk_update(recipes, ["pub_date"])
+        Recipe.tags.through.objects.bulk_create(tags)
+        IngredientInRecipe.objects.bulk_create(items)
+
+    def load_relations(self, model, target, targets, batch):
+        objects = []
+        for record in batch:
+            user = self.users.get(record["user"])
+            related = targets.get(record[target])
+            if user is None or related is None:
+                self.skipped[model._meta.verbose_name_plural] += 1
+                continue
+            objects.append(
+                model(**{"user_id": user, f"{target}_id": related})
+            )
+        model.objects.bulk_create(objects, ignore_conflicts=True)
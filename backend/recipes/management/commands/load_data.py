@@ -1,7 +1,13 @@
+import time
 from csv import DictReader
+from pathlib import Path
 
-from django.core.management import BaseCommand
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
 
+from recipes.cache import bump_generation
+from recipes.importers import READERS, SPECS, upsert_rows
+from recipes.indexes import ingredient_index
 from recipes.models import Ingredient, Tag
 
 
@@ -9,17 +15,56 @@ ALREDY_LOADED_ERROR_MESSAGE = """
 If you need to reload the child data from the CSV file,
 first delete the db.sqlite3 file to destroy the database.
 Then, run `python manage.py migrate` for a new empty
-database with tables"""
+database with tables, or use --upsert"""
 
+DATA_DIR = Path(settings.BASE_DIR) / "recipes" / "data"
 TABLES = {Ingredient: "ingredients.csv", Tag: "tags.csv"}
 
 
 class Command(BaseCommand):
     help = "Loads data from csv files"
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Insert new and update existing rows by natural key",
+        )
+        parser.add_argument(
+            "--file",
+            help="CSV, JSON or NDJSON file to upsert, implies --upsert",
+        )
+        parser.add_argument(
+            "--table",
+            choices=SPECS,
+            help="Table of --file, guessed from the file name by default",
+        )
+        parser.add_argument("--format", choices=READERS)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use INSERT ... ON CONFLICT instead of COPY on Postgres",
+        )
+
+    def handle(self, *args, **options):
+        if options["file"]:
+            path = Path(options["file"])
+            table = options["table"] or path.stem.split(".")[0]
+            if table not in SPECS:
+                raise CommandError("Cannot guess the table, use --table")
+            self.upsert(table, path, options)
+        elif options["upsert"]:
+            for table, spec in SPECS.items():
+                self.upsert(table, DATA_DIR / TABLES[spec.model], options)
+        else:
+            self.load(options["batch_size"])
+        ingredient_index.invalidate()
+        bump_generation("tags", "ingredients")
+
+    def load(self, batch_size):
         for model, csv in TABLES.items():
-            with open(f"recipes/data/{csv}", encoding="utf-8") as file:
+            with open(DATA_DIR / csv, encoding="utf-8") as file:
                 if model.objects.exists():
                     self.stdout.write(
                         self.style.WARNING(
@@ -29,5 +74,34 @@ class Command(BaseCommand):
                     self.stdout.write(ALREDY_LOADED_ERROR_MESSAGE)
                     continue
                 reader = DictReader(file)
-                model.objects.bulk_create(model(**data) for data in reader)
+                model.objects.bulk_create(
+                    (model(**data) for data in reader), batch_size=batch_size
+                )
             self.stdout.write(self.style.SUCCESS("Все данные загружены"))
+
+    def upsert(self, table, path, options):
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in READERS:
+            raise CommandError(f"Unknown file format {file_format}")
+        started = time.monotonic()
+
+        def progress(total):
+            elapsed = max(time.monotonic() - started, 1e-6)
+            self.stdout.write(
+                f"{table}: {total} rows ({total / elapsed:.0f} rows/s)"
+            )
+
+        with open(path, encoding="utf-8", newline="") as file:
+            total = upsert_rows(
+                SPECS[table],
+                READERS[file_format](file),
+                options["batch_size"],
+                use_copy=not options["no_copy"],
+                progress=progress,
+            )
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{table}: {total} rows from {path} in {elapsed:.1f}s"
+            )
+        )
@@ -0,0 +1,60 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.models import ShoppingCartIngredient
+from recipes.shopping_cart import calculate_shopping_totals
+
+
+class Command(BaseCommand):
+    help = "Rebuilds and reconciles per-user shopping list totals"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Reconcile only the given user id (can be repeated)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the drift, do not fix it",
+        )
+
+    def handle(self, *args, user_ids=None, dry_run=False, **kwargs):
+        with transaction.atomic():
+            expected = calculate_shopping_totals(user_ids)
+            stored = ShoppingCartIngredient.objects.select_for_update()
+            if user_ids is not None:
+                stored = stored.filter(user_id__in=user_ids)
+            to_update, to_delete = [], []
+            for total in stored.iterator():
+                amount = expected.pop(
+                    (total.user_id, total.ingredient_id), None
+                )
+                if amount is None:
+                    to_delete.append(total.id)
+                elif amount != total.amount:
+                    total.amount = amount
+                    to_update.append(total)
+            to_create = [
+                ShoppingCartIngredient(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=amount
+                )
+                for (user_id, ingredient_id), amount in expected.items()
+            ]
+            self.stdout.write(
+                f"Missing: {len(to_create)}, wrong: {len(to_update)}, "
+                f"stale: {len(to_delete)}"
+            )
+            if dry_run:
+                return
+            ShoppingCartIngredient.objects.bulk_create(
+                to_create, batch_size=1000
+            )
+            ShoppingCartIngredient.objects.bulk_update(
+                to_update, ["amount"], batch_size=1000
+            )
+            ShoppingCartIngredient.objects.filter(id__in=to_delete).delete()
+        self.stdout.write(self.style.SUCCESS("Итоги списков покупок сверены"))
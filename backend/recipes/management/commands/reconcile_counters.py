@@ -0,0 +1,23 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Reconciles denormalized recipe and favorite counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the drift, do not fix it",
+        )
+
+    def handle(self, *args, dry_run=False, **kwargs):
+        with transaction.atomic():
+            drift = reconcile_counters(dry_run=dry_run)
+        for counter, fixed in drift.items():
+            self.stdout.write(f"{counter}: {fixed}")
+        if not dry_run:
+            self.stdout.write(self.style.SUCCESS("Счётчики сверены"))
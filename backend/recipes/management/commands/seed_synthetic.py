@@ -0,0 +1,194 @@
+import random
+import time
+from io import BytesIO
+
+from PIL import Image
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand, call_command
+
+from recipes.cache import bump_generation
+from recipes.importers import chunked
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from user.models import Follow, User
+
+
+IMAGE_NAME = "recipes/synthetic.png"
+WORDS = (
+    "суп",
+    "салат",
+    "пирог",
+    "рагу",
+    "каша",
+    "запеканка",
+    "домашний",
+    "острый",
+    "летний",
+    "быстрый",
+    "сырный",
+    "овощной",
+)
+
+
+class Command(BaseCommand):
+    help = "Generates a reproducible synthetic dataset for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes-per-user", type=int, default=10)
+        parser.add_argument("--min-ingredients", type=int, default=3)
+        parser.add_argument("--max-ingredients", type=int, default=15)
+        parser.add_argument("--follows-per-user", type=int, default=20)
+        parser.add_argument("--favorites-per-user", type=int, default=30)
+        parser.add_argument("--cart-per-user", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def write_created(self, model, count, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"{model.__name__}: {count} rows in {elapsed:.1f}s "
+            f"({count / max(elapsed, 1e-6):.0f} rows/s)"
+        )
+
+    def bulk_create(self, model, objects, batch_size):
+        started = time.monotonic()
+        created = []
+        for chunk in chunked(objects, batch_size):
+            created.extend(model.objects.bulk_create(chunk))
+        self.write_created(model, len(created), started)
+        return created
+
+    def bulk_insert(self, model, objects, batch_size):
+        """Как bulk_create, но не держит созданные объекты в памяти."""
+        started = time.monotonic()
+        count = 0
+        for chunk in chunked(objects, batch_size):
+            model.objects.bulk_create(chunk, ignore_conflicts=True)
+            count += len(chunk)
+        self.write_created(model, count, started)
+
+    def ensure_image(self):
+        if not default_storage.exists(IMAGE_NAME):
+            buffer = BytesIO()
+            Image.new("RGB", (64, 64), "orange").save(buffer, "PNG")
+            default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        if not Ingredient.objects.exists() or not Tag.objects.exists():
+            call_command("load_data", stdout=self.stdout)
+        ingredient_ids = list(Ingredient.objects.values_list("id", flat=True))
+        tag_ids = list(Tag.objects.values_list("id", flat=True))
+        self.ensure_image()
+
+        offset = (
+            User.objects.order_by("-id").values_list("id", flat=True).first()
+            or 0
+        )
+        password = make_password("synthetic")
+        users = self.bulk_create(
+            User,
+            (
+                User(
+                    username=f"synthetic{offset + number}",
+                    email=f"synthetic{offset + number}@example.com",
+                    first_name="Synthetic",
+                    last_name=str(offset + number),
+                    password=password,
+                )
+                for number in range(options["users"])
+            ),
+            batch_size,
+        )
+        user_ids = [user.id for user in users]
+
+        recipes = self.bulk_create(
+            Recipe,
+            (
+                Recipe(
+                    author_id=user_id,
+                    name=" ".join(rng.sample(WORDS, 3)).capitalize(),
+                    text=" ".join(rng.choices(WORDS, k=40)),
+                    cooking_time=rng.randint(5, 180),
+                    image=IMAGE_NAME,
+                )
+                for user_id in user_ids
+                for _ in range(options["recipes_per_user"])
+            ),
+            batch_size,
+        )
+        recipe_ids = [recipe.id for recipe in recipes]
+
+        self.bulk_insert(
+            Recipe.tags.through,
+            (
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in rng.sample(
+                    tag_ids, rng.randint(1, min(3, len(tag_ids)))
+                )
+            ),
+            batch_size,
+        )
+        self.bulk_insert(
+            IngredientInRecipe,
+            (
+                IngredientInRecipe(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=rng.randint(1, 500),
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in rng.sample(
+                    ingredient_ids,
+                    rng.randint(
+                        options["min_ingredients"], options["max_ingredients"]
+                    ),
+                )
+            ),
+            batch_size,
+        )
+        self.bulk_insert(
+            Follow,
+            (
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id in user_ids
+                for author_id in rng.sample(
+                    user_ids,
+                    min(options["follows_per_user"], len(user_ids)),
+                )
+                if author_id != user_id
+            ),
+            batch_size,
+        )
+        for model, per_user in (
+            (Favorite, options["favorites_per_user"]),
+            (ShoppingCart, options["cart_per_user"]),
+        ):
+            self.bulk_insert(
+                model,
+                (
+                    model(user_id=user_id, recipe_id=recipe_id)
+                    for user_id in user_ids
+                    for recipe_id in rng.sample(
+                        recipe_ids, min(per_user, len(recipe_ids))
+                    )
+                ),
+                batch_size,
+            )
+
+        call_command("reconcile_counters", stdout=self.stdout)
+        call_command("rebuild_shopping_totals", stdout=self.stdout)
+        bump_generation("recipes", "users")
+        self.stdout.write(self.style.SUCCESS("Синтетические данные созданы"))
@@ -31,7 +31,7 @@ class Migration(migrations.Migration):
                 ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
                 ('name', models.CharField(help_text='Название рецепта', max_length=200, verbose_name='Рецепт')),
                 ('image', models.ImageField(help_text='Фотография блюда', upload_to='recipes/', verbose_name='Фотография')),
-                ('text', models.CharField(help_text='Описание рецепта', verbose_name='Описание')),
+                ('text', models.TextField(help_text='Описание рецепта', verbose_name='Описание')),
                 ('cooking_time', models.SmallIntegerField(help_text='Время приготовления блюда', validators=[django.core.validators.MinValueValidator(1)], verbose_name='Время приготовления')),
                 ('pub_date', models.DateTimeField(auto_now_add=True)),
                 ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipes', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-18 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_favorites_count_recipe_shopping_cart_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='text',
+            field=models.TextField(help_text='Описание рецепта', verbose_name='Описание'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.2 on 2026-10-18 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_alter_recipe_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_card',
+            field=models.ImageField(blank=True, editable=False, upload_to='recipes/renditions/', verbose_name='Фотография для карточки'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_detail',
+            field=models.ImageField(blank=True, editable=False, upload_to='recipes/renditions/', verbose_name='Фотография для страницы рецепта'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-18 05:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_image_card_recipe_image_detail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_status',
+            field=models.CharField(choices=[('ready', 'Готова'), ('pending', 'Обрабатывается'), ('failed', 'Ошибка обработки')], default='ready', editable=False, max_length=20, verbose_name='Обработка фотографии'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+from django.db import migrations
+
+
+# SQL встроен в миграцию: она не должна зависеть от кода приложения,
+# который может измениться. Триггеры SQLite после пересоздания таблицы
+# recipes_recipe восстанавливает recipes.search.ensure_search_triggers.
+FORWARD = {
+    "postgresql": (
+        """
+        ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian', coalesce(name, '')), 'A')
+            || setweight(to_tsvector('russian', coalesce(text, '')), 'B')
+        ) STORED
+        """,
+        """
+        CREATE INDEX recipes_recipe_search_vector
+        ON recipes_recipe USING gin (search_vector)
+        """,
+    ),
+    "sqlite": (
+        """
+        CREATE VIRTUAL TABLE recipes_recipe_fts USING fts5(
+            name, text, content='recipes_recipe', content_rowid='id',
+            tokenize='unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER recipes_recipe_fts_insert AFTER INSERT
+        ON recipes_recipe BEGIN
+            INSERT INTO recipes_recipe_fts(rowid, name, text)
+            VALUES (new.id, new.name, new.text);
+        END
+        """,
+        """
+        CREATE TRIGGER recipes_recipe_fts_delete AFTER DELETE
+        ON recipes_recipe BEGIN
+            INSERT INTO recipes_recipe_fts(
+                recipes_recipe_fts, rowid, name, text
+            )
+            VALUES ('delete', old.id, old.name, old.text);
+        END
+        """,
+        """
+        CREATE TRIGGER recipes_recipe_fts_update AFTER UPDATE OF name, text
+        ON recipes_recipe BEGIN
+            INSERT INTO recipes_recipe_fts(
+                recipes_recipe_fts, rowid, name, text
+            )
+            VALUES ('delete', old.id, old.name, old.text);
+            INSERT INTO recipes_recipe_fts(rowid, name, text)
+            VALUES (new.id, new.name, new.text);
+        END
+        """,
+        """
+        INSERT INTO recipes_recipe_fts(recipes_recipe_fts)
+        VALUES ('rebuild')
+        """,
+    ),
+}
+BACKWARD = {
+    "postgresql": (
+        "DROP INDEX IF EXISTS recipes_recipe_search_vector",
+        "ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector",
+    ),
+    "sqlite": (
+        "DROP TRIGGER IF EXISTS recipes_recipe_fts_insert",
+        "DROP TRIGGER IF EXISTS recipes_recipe_fts_delete",
+        "DROP TRIGGER IF EXISTS recipes_recipe_fts_update",
+        "DROP TABLE IF EXISTS recipes_recipe_fts",
+    ),
+}
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in statements.get(vendor, ()):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    """Postgres: хранимый tsvector, вычисляемый базой, и GIN-индекс.
+    SQLite: внешняя FTS5-таблица, которую обновляют триггеры."""
+
+    dependencies = [
+        ("recipes", "0012_recipe_image_status"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements(FORWARD), run_statements(BACKWARD)
+        ),
+    ]
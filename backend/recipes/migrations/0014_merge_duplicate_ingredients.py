@@ -0,0 +1,55 @@
+# Generated by Django 4.2.2 on 2026-10-18 05:15
+
+from django.db import migrations, models
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Сливает ингредиенты с одинаковыми названием и единицей измерения
+    в один (с наименьшим id), складывая количества в рецептах и списках
+    покупок, где встретились оба."""
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    duplicates = (
+        Ingredient.objects.values('name', 'measurement_unit')
+        .annotate(keep_id=models.Min('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    for group in duplicates:
+        merged_ids = list(
+            Ingredient.objects.filter(
+                name=group['name'],
+                measurement_unit=group['measurement_unit'],
+            )
+            .exclude(id=group['keep_id'])
+            .values_list('id', flat=True)
+        )
+        for model_name, owner in (
+            ('IngredientInRecipe', 'recipe_id'),
+            ('ShoppingCartIngredient', 'user_id'),
+        ):
+            model = apps.get_model('recipes', model_name)
+            for row in model.objects.filter(ingredient_id__in=merged_ids):
+                kept = model.objects.filter(
+                    **{owner: getattr(row, owner)},
+                    ingredient_id=group['keep_id'],
+                ).first()
+                if kept is None:
+                    row.ingredient_id = group['keep_id']
+                    row.save(update_fields=['ingredient'])
+                else:
+                    kept.amount += row.amount
+                    kept.save(update_fields=['amount'])
+                    row.delete()
+        Ingredient.objects.filter(id__in=merged_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
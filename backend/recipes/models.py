@@ -54,12 +54,27 @@ class Ingredient(models.Model):
         ordering = ("name",)
         verbose_name = "Ингредиент"
         verbose_name_plural = "Ингредиенты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "measurement_unit"],
+                name="uq_ingredient_name_measurement_unit",
+            )
+        ]
 
     def __str__(self) -> str:
         return f"{self.name}, {self.measurement_unit}"
 
 
 class Recipe(models.Model):
+    IMAGE_READY = "ready"
+    IMAGE_PENDING = "pending"
+    IMAGE_FAILED = "failed"
+    IMAGE_STATUSES = (
+        (IMAGE_READY, "Готова"),
+        (IMAGE_PENDING, "Обрабатывается"),
+        (IMAGE_FAILED, "Ошибка обработки"),
+    )
+
     tags = models.ManyToManyField(
         Tag,
         verbose_name="Тэг",
@@ -87,7 +102,26 @@ class Recipe(models.Model):
         help_text="Фотография блюда",
         upload_to="recipes/",
     )
-    text = models.CharField(
+    image_status = models.CharField(
+        verbose_name="Обработка фотографии",
+        max_length=20,
+        choices=IMAGE_STATUSES,
+        default=IMAGE_READY,
+        editable=False,
+    )
+    image_card = models.ImageField(
+        verbose_name="Фотография для карточки",
+        upload_to="recipes/renditions/",
+        blank=True,
+        editable=False,
+    )
+    image_detail = models.ImageField(
+        verbose_name="Фотография для страницы рецепта",
+        upload_to="recipes/renditions/",
+        blank=True,
+        editable=False,
+    )
+    text = models.TextField(
         verbose_name="Описание",
         help_text="Описание рецепта",
     )
@@ -97,6 +131,16 @@ class Recipe(models.Model):
         validators=[MinValueValidator(MIN_COOKING_TIME)],
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    favorites_count = models.PositiveIntegerField(
+        verbose_name="В избранном",
+        default=0,
+        editable=False,
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        verbose_name="В списках покупок",
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Рецепт"
@@ -187,3 +231,32 @@ class ShoppingCart(models.Model):
                 name="recipe_in_shopping_cart",
             )
         ]
+
+
+class ShoppingCartIngredient(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        help_text="Пользователь",
+        related_name="shopping_ingredients",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        help_text="Ингредиент",
+        related_name="shopping_totals",
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name="Количество",
+        help_text="Суммарное количество ингредиента в списке покупок",
+    )
+
+    class Meta:
+        verbose_name = "Ингредиент в списке покупок"
+        verbose_name_plural = "Ингредиенты в списках покупок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"],
+                name="uq_shopping_cart_ingredient",
+            )
+        ]
@@ -0,0 +1,127 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_CONFIG = "russian"
+FTS_TABLE = "recipes_recipe_fts"
+WORD_RE = re.compile(r"\w+")
+
+# Таблица и триггеры создаются миграцией 0013_recipe_search_index. На
+# Postgres search_vector — генерируемый столбец: чтобы изменить тип
+# name или text, его нужно удалить и создать заново в той же миграции.
+# На SQLite ALTER TABLE из миграций пересоздаёт recipes_recipe и теряет
+# триггеры, поэтому после каждого migrate их восстанавливает
+# ensure_search_triggers.
+SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_insert": f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT
+    ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    """,
+    f"{FTS_TABLE}_delete": f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE
+    ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+    END
+    """,
+    f"{FTS_TABLE}_update": f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF name, text ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    """,
+}
+
+
+def ensure_search_triggers(using="default"):
+    """Создаёт недостающие триггеры FTS5-таблицы и перестраивает её
+    индекс, если триггеры были потеряны. Возвращает имена созданных."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE name = %s OR tbl_name = 'recipes_recipe'",
+            [FTS_TABLE],
+        )
+        existing = {name for (name,) in cursor.fetchall()}
+        if FTS_TABLE not in existing:
+            return []
+        missing = [name for name in SQLITE_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(SQLITE_TRIGGERS[name])
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+    return missing
+
+
+def search_postgres(queryset, value):
+    from django.contrib.postgres.search import (
+        SearchQuery,
+        SearchRank,
+        SearchVectorField,
+    )
+
+    vector = RawSQL(
+        "recipes_recipe.search_vector", (), output_field=SearchVectorField()
+    )
+    query = SearchQuery(value, config=SEARCH_CONFIG, search_type="websearch")
+    return (
+        queryset.alias(search_vector=vector)
+        .filter(search_vector=query)
+        .annotate(search_rank=SearchRank(vector, query))
+    )
+
+
+def fts5_query(value):
+    """Слова запроса как FTS5-строки с поиском по префиксу, чтобы
+    пользовательский ввод не разбирался как синтаксис FTS5."""
+    return " ".join(f'"{word}"*' for word in WORD_RE.findall(value))
+
+
+def search_sqlite(queryset, value):
+    query = fts5_query(value)
+    if not query:
+        return queryset.none()
+    # Соединение с FTS5-таблицей: ранг считается за один проход по
+    # совпадениям, коррелированный подзапрос повторял бы MATCH для
+    # каждой строки. bm25 тем меньше, чем лучше совпадение.
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f"{FTS_TABLE} MATCH %s",
+            f"{FTS_TABLE}.rowid = recipes_recipe.id",
+        ],
+        params=[query],
+        select={"search_rank": f"-bm25({FTS_TABLE}, 10.0, 1.0)"},
+    )
+
+
+def search_recipes(queryset, value):
+    """Полнотекстовый поиск по названию и описанию рецепта. Результаты
+    упорядочены по релевантности, название весит больше описания."""
+    value = value.strip()
+    if not value:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        queryset = search_postgres(queryset, value)
+    elif vendor == "sqlite":
+        queryset = search_sqlite(queryset, value)
+    else:
+        return queryset.filter(
+            Q(name__icontains=value) | Q(text__icontains=value)
+        )
+    return queryset.order_by("-search_rank", "-pub_date", "-id")
@@ -0,0 +1,119 @@
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Sum
+
+from recipes.models import (
+    IngredientInRecipe,
+    ShoppingCart,
+    ShoppingCartIngredient,
+)
+
+
+def recipe_amounts(recipe):
+    """Количества ингредиентов рецепта: {ingredient_id: amount}."""
+    return dict(
+        IngredientInRecipe.objects.filter(recipe=recipe).values_list(
+            "ingredient_id", "amount"
+        )
+    )
+
+
+def apply_shopping_delta(user_ids, deltas):
+    """Прибавляет deltas ({ingredient_id: количество}) к итогам списков
+    покупок пользователей user_ids. Строки с нулевым итогом удаляются.
+    """
+    deltas = {key: value for key, value in deltas.items() if value}
+    if not deltas:
+        return
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    with transaction.atomic():
+        ShoppingCartIngredient.objects.bulk_create(
+            [
+                ShoppingCartIngredient(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=0
+                )
+                for user_id in user_ids
+                for ingredient_id in deltas
+            ],
+            ignore_conflicts=True,
+        )
+        totals = ShoppingCartIngredient.objects.select_for_update().filter(
+            user_id__in=user_ids, ingredient_id__in=deltas
+        )
+        totals = list(totals)
+        for total in totals:
+            total.amount = max(total.amount + deltas[total.ingredient_id], 0)
+        ShoppingCartIngredient.objects.bulk_update(totals, ["amount"])
+        ShoppingCartIngredient.objects.filter(
+            user_id__in=user_ids, amount=0
+        ).delete()
+
+
+def recipes_amounts(recipe_ids):
+    """Суммарные количества ингредиентов нескольких рецептов."""
+    return dict(
+        IngredientInRecipe.objects.filter(recipe_id__in=recipe_ids)
+        .values("ingredient_id")
+        .annotate(amount_sum=Sum("amount"))
+        .values_list("ingredient_id", "amount_sum")
+    )
+
+
+def add_to_shopping_totals(recipe, user_ids):
+    apply_shopping_delta(user_ids, recipe_amounts(recipe))
+
+
+def remove_from_shopping_totals(recipe, user_ids):
+    apply_shopping_delta(
+        user_ids,
+        {key: -value for key, value in recipe_amounts(recipe).items()},
+    )
+
+
+def change_shopping_totals(recipe, old_amounts, new_amounts):
+    """Переносит изменение состава рецепта в списки покупок всех
+    пользователей, добавивших его в корзину."""
+    deltas = {
+        ingredient_id: new_amounts.get(ingredient_id, 0)
+        - old_amounts.get(ingredient_id, 0)
+        for ingredient_id in old_amounts.keys() | new_amounts.keys()
+    }
+    user_ids = ShoppingCart.objects.filter(recipe=recipe).values_list(
+        "user_id", flat=True
+    )
+    apply_shopping_delta(user_ids, deltas)
+
+
+@contextmanager
+def track_recipe_amounts(recipe_ids):
+    """Переносит в списки покупок изменения состава рецептов recipe_ids,
+    сделанные внутри блока, например строками IngredientInRecipe из
+    админки."""
+    old_amounts = {pk: recipe_amounts(pk) for pk in recipe_ids if pk}
+    yield
+    for pk, amounts in old_amounts.items():
+        change_shopping_totals(pk, amounts, recipe_amounts(pk))
+
+
+def calculate_shopping_totals(user_ids=None):
+    """Итоги списков покупок, посчитанные заново по корзинам:
+    {(user_id, ingredient_id): amount}."""
+    ingredients = IngredientInRecipe.objects.filter(
+        recipe__shopping_recipes__isnull=False
+    )
+    if user_ids is not None:
+        ingredients = ingredients.filter(
+            recipe__shopping_recipes__user_id__in=user_ids
+        )
+    ingredients = ingredients.values(
+        "recipe__shopping_recipes__user_id", "ingredient_id"
+    ).annotate(amount_sum=Sum("amount"))
+    totals = defaultdict(int)
+    for row in ingredients.iterator():
+        key = (row["recipe__shopping_recipes__user_id"], row["ingredient_id"])
+        totals[key] = row["amount_sum"]
+    return totals
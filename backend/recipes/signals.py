@@ -0,0 +1,93 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from recipes.cache import bump_on_commit
+from recipes.counters import change_counter
+from recipes.indexes import ingredient_index
+from recipes.models import Ingredient, IngredientInRecipe, Recipe, Tag
+from recipes.search import ensure_search_triggers
+from recipes.shopping_cart import remove_from_shopping_totals
+from recipes.user_lists import COUNTERS, change_counters
+from user.models import User
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    ingredient_index.invalidate()
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=IngredientInRecipe)
+@receiver(post_delete, sender=IngredientInRecipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def bump_recipes_generation(**kwargs):
+    bump_on_commit("recipes")
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_tags_generation(**kwargs):
+    bump_on_commit("tags")
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_ingredients_generation(**kwargs):
+    bump_on_commit("ingredients")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_users_generation(update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    bump_on_commit("users")
+
+
+@receiver(post_save, sender=Recipe)
+def count_created_recipe(instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, "recipes_count", True)
+
+
+@receiver(post_delete, sender=Recipe)
+def count_deleted_recipe(instance, **kwargs):
+    change_counter(User, instance.author_id, "recipes_count", False)
+
+
+@receiver(pre_delete, sender=Recipe)
+def uncount_shopping_totals(instance, **kwargs):
+    """Корзины с удаляемым рецептом удаляются каскадом, поэтому его
+    ингредиенты вычитаются из списков покупок заранее. Срабатывает при
+    удалении через API и админку и при удалении автора."""
+    remove_from_shopping_totals(
+        instance, instance.shopping_recipes.values_list("user_id", flat=True)
+    )
+
+
+@receiver(pre_delete, sender=User)
+def uncount_user_lists(instance, **kwargs):
+    """Избранное и корзина удаляемого пользователя удаляются каскадом
+    без сигналов, поэтому счётчики рецептов уменьшаются заранее."""
+    for model in COUNTERS:
+        change_counters(
+            model,
+            model.objects.filter(user=instance).values("recipe_id"),
+            -1,
+        )
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    """Миграции, пересоздающие таблицу рецептов на SQLite, удаляют
+    триггеры полнотекстового индекса; они создаются заново."""
+    if sender.name == "recipes":
+        ensure_search_triggers(using)
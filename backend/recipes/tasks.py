@@ -0,0 +1,72 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from jobs.registry import enqueue, task
+from recipes.images import (
+    RENDITIONS,
+    create_renditions,
+    delete_pending_image,
+    read_pending_image,
+)
+from recipes.models import Recipe
+
+
+logger = logging.getLogger(__name__)
+
+
+def mark_image_failed(recipe_id, path):
+    """Обработка фотографии не удалась за все попытки задачи."""
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is not None and recipe.image_status == Recipe.IMAGE_PENDING:
+        recipe.image_status = Recipe.IMAGE_FAILED
+        recipe.save(update_fields=["image_status"])
+    delete_pending_image(path)
+
+
+@task("recipes.process_image", on_failure=mark_image_failed)
+def process_image(recipe_id, path):
+    """Декодирует загруженную через API фотографию, сохраняет её в
+    рецепт и создаёт уменьшенные копии. Загруженный файл удаляется
+    только в конце: при ошибке задача повторяется с тем же файлом."""
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is None:
+        delete_pending_image(path)
+        return
+    try:
+        content = read_pending_image(path)
+    except FileNotFoundError:
+        # Файл уже обработан предыдущим запуском задачи.
+        return
+    except ValidationError:
+        mark_image_failed(recipe_id, path)
+        return
+    recipe.image.save(content.name, content, save=False)
+    create_renditions(recipe)
+    recipe.image_status = Recipe.IMAGE_READY
+    recipe.save(update_fields=["image", "image_status"])
+    delete_pending_image(path)
+
+
+@task("recipes.create_renditions")
+def build_renditions(recipe_id):
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is not None and recipe.image:
+        create_renditions(recipe)
+
+
+def schedule_renditions(recipe):
+    """Создаёт уменьшенные копии сразу или ставит это в очередь. Ошибка
+    при создании копий не отменяет сохранение рецепта: остаётся
+    оригинал, а image_status становится failed."""
+    if settings.IMAGE_PROCESSING_ASYNC:
+        enqueue("recipes.create_renditions", recipe_id=recipe.id)
+        return
+    try:
+        create_renditions(recipe)
+    except Exception:
+        logger.exception("Не удалось создать копии фото рецепта %s", recipe.id)
+        recipe.refresh_from_db(fields=list(RENDITIONS))
+        recipe.image_status = Recipe.IMAGE_FAILED
+        recipe.save(update_fields=["image_status"])
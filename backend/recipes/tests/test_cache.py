@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+
+from recipes.cache import (
+    GENERATION_KEY,
+    bump_generation,
+    bump_on_commit,
+    get_generations,
+)
+
+
+class GenerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_transaction_bumps_each_generation_once(self):
+        before = get_generations("recipes", "tags")
+        with self.captureOnCommitCallbacks() as callbacks:
+            bump_on_commit("recipes")
+            bump_on_commit("recipes", "tags")
+            bump_on_commit("recipes")
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(get_generations("recipes", "tags"), before)
+        callbacks[0]()
+        after = get_generations("recipes", "tags")
+        self.assertNotEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+
+    def test_rolled_back_savepoint_registers_new_bump(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    bump_on_commit("recipes")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            bump_on_commit("tags")
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(callbacks[0].names, {"tags"})
+
+    def test_generation_does_not_expire(self):
+        get_generations("recipes")
+        bump_generation("recipes")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT expires FROM django_cache WHERE cache_key = %s",
+                [cache.make_key(GENERATION_KEY.format("recipes"))],
+            )
+            (expires,) = cursor.fetchone()
+        self.assertEqual(str(expires)[:4], "9999")
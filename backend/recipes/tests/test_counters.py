@@ -0,0 +1,79 @@
+from rest_framework.test import APIClient
+
+from django.test import TestCase
+
+from recipes.counters import reconcile_counters
+from recipes.models import Ingredient, IngredientInRecipe, Recipe, Tag
+from user.models import User
+
+
+def create_user(username, **kwargs):
+    return User.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="password",
+        first_name="Имя",
+        last_name="Фамилия",
+        **kwargs,
+    )
+
+
+class RecipesCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user("author")
+        cls.new_author = create_user("new_author")
+        cls.tag = Tag.objects.create(
+            name="Обед", color="#00FF00", slug="lunch"
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author,
+            name="Суп",
+            text="Описание",
+            cooking_time=10,
+            image="recipes/images/recipe.png",
+        )
+        cls.recipe.tags.set([cls.tag])
+        cls.row = IngredientInRecipe.objects.create(
+            recipe=cls.recipe,
+            ingredient=Ingredient.objects.create(
+                name="Соль", measurement_unit="г"
+            ),
+            amount=5,
+        )
+
+    def recipes_counts(self):
+        return [
+            User.objects.get(pk=user.pk).recipes_count
+            for user in (self.author, self.new_author)
+        ]
+
+    def test_admin_author_change_moves_recipes_count(self):
+        self.assertEqual(self.recipes_counts(), [1, 0])
+        client = APIClient()
+        client.force_login(
+            create_user("admin", is_staff=True, is_superuser=True)
+        )
+        response = client.post(
+            f"/admin/recipes/recipe/{self.recipe.id}/change/",
+            {
+                "tags": [self.tag.id],
+                "author": self.new_author.id,
+                "name": self.recipe.name,
+                "text": self.recipe.text,
+                "cooking_time": self.recipe.cooking_time,
+                "recipe-TOTAL_FORMS": 1,
+                "recipe-INITIAL_FORMS": 1,
+                "recipe-MIN_NUM_FORMS": 1,
+                "recipe-MAX_NUM_FORMS": 1000,
+                "recipe-0-id": self.row.id,
+                "recipe-0-recipe": self.recipe.id,
+                "recipe-0-ingredient": self.row.ingredient_id,
+                "recipe-0-amount": self.row.amount,
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.recipes_counts(), [0, 1])
+        self.assertEqual(
+            reconcile_counters(dry_run=True)["recipes_count"], 0
+        )
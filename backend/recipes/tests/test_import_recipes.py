@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from recipes.indexes import ingredient_index
+from recipes.models import Recipe
+
+
+def recipe_record(id, author, ingredients):
+    return {
+        "type": "recipe",
+        "id": id,
+        "author": author,
+        "name": f"Рецепт {id}",
+        "text": "Описание",
+        "cooking_time": 10,
+        "pub_date": "2024-01-01T00:00:00+00:00",
+        "image": "recipes/images/recipe.png",
+        "tags": [],
+        "ingredients": ingredients,
+    }
+
+
+class ImportRecipesTests(TestCase):
+    def import_records(self, records):
+        fd, path = tempfile.mkstemp(suffix=".ndjson")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out = StringIO()
+        call_command("import_recipes", path, stdout=out)
+        return out.getvalue()
+
+    def test_import(self):
+        self.addCleanup(ingredient_index.invalidate)
+        self.assertEqual(ingredient_index.search("Шафран"), [])
+        output = self.import_records(
+            [
+                {
+                    "type": "user",
+                    "id": 7,
+                    "username": "cook",
+                    "email": "cook@example.com",
+                    "first_name": "Повар",
+                    "last_name": "Поваров",
+                    "password": "",
+                    "date_joined": "2024-01-01T00:00:00+00:00",
+                },
+                recipe_record(1, 7, [["Шафран", "г", 1]]),
+                recipe_record(2, 8, [["Соль", "г", 5]]),
+                recipe_record(3, 9, []),
+            ]
+        )
+        self.assertEqual(
+            list(Recipe.objects.values_list("name", flat=True)),
+            ["Рецепт 1"],
+        )
+        self.assertIn("Skipped recipes without author: 2", output)
+        self.assertEqual(
+            [item.name for item in ingredient_index.search("Шафран")],
+            ["Шафран"],
+        )
@@ -0,0 +1,64 @@
+from rest_framework.test import APIClient
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from recipes.models import Recipe
+from recipes.search import SQLITE_TRIGGERS, search_recipes
+from user.models import User
+
+
+class RecipeSearchTests(TestCase):
+    """Полнотекстовый поиск по рецептам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author",
+            email="author@example.com",
+            password="password",
+            first_name="Имя",
+            last_name="Фамилия",
+        )
+        cls.in_text = cls.create_recipe("Суп", "Борщ со сметаной")
+        cls.in_name = cls.create_recipe("Борщ", "Свекла и капуста")
+        cls.create_recipe("Каша", "Гречка")
+
+    @classmethod
+    def create_recipe(cls, name, text):
+        return Recipe.objects.create(
+            author=cls.author,
+            name=name,
+            text=text,
+            cooking_time=10,
+            image="recipes/images/recipe.png",
+        )
+
+    def search(self, value):
+        return list(search_recipes(Recipe.objects.all(), value))
+
+    def test_name_ranks_above_text(self):
+        self.assertEqual(self.search("борщ"), [self.in_name, self.in_text])
+
+    def test_index_follows_updates(self):
+        Recipe.objects.filter(pk=self.in_text.pk).update(text="Щи")
+        self.assertEqual(self.search("борщ"), [self.in_name])
+
+    def test_migrate_restores_dropped_triggers(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Триггеры FTS5 есть только на SQLite.")
+        with connection.cursor() as cursor:
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER {name}")
+        call_command("migrate", verbosity=0)
+        self.assertEqual(self.search("борщ"), [self.in_name, self.in_text])
+        recipe = self.create_recipe("Окрошка", "Квас")
+        self.assertEqual(self.search("окрошка"), [recipe])
+
+    def test_search_with_cursor_is_rejected(self):
+        response = APIClient().get(
+            "/api/recipes/", {"search": "борщ", "cursor": ""}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("cursor", response.json())
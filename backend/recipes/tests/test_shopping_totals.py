@@ -0,0 +1,161 @@
+from rest_framework.test import APIClient
+
+from django.test import TestCase
+
+from recipes.models import (
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    ShoppingCartIngredient,
+    Tag,
+)
+from recipes.shopping_cart import calculate_shopping_totals
+from recipes.user_lists import add_recipe
+from user.models import User
+
+
+def create_user(username, **kwargs):
+    return User.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="password",
+        first_name="Имя",
+        last_name="Фамилия",
+        **kwargs,
+    )
+
+
+class ShoppingTotalsTests(TestCase):
+    """Итоги списков покупок совпадают с пересчётом по корзинам после
+    любых удалений и правок состава рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user("author")
+        cls.other_author = create_user("other")
+        cls.buyer = create_user("buyer")
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ингредиент {i}", measurement_unit="г")
+            for i in range(3)
+        )
+        cls.recipe = cls.create_recipe(cls.author, (100, 200))
+        cls.other_recipe = cls.create_recipe(cls.other_author, (50, 0, 30))
+        for recipe in (cls.recipe, cls.other_recipe):
+            add_recipe(ShoppingCart, cls.buyer.id, recipe.id)
+
+    @classmethod
+    def create_recipe(cls, author, amounts):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=f"Рецепт {author.username}",
+            text="Описание",
+            cooking_time=10,
+            image="recipes/images/recipe.png",
+        )
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            )
+            for ingredient, amount in zip(cls.ingredients, amounts)
+            if amount
+        )
+        return recipe
+
+    def totals(self):
+        return {
+            (row.user_id, row.ingredient_id): row.amount
+            for row in ShoppingCartIngredient.objects.all()
+        }
+
+    def assert_totals_consistent(self, expected):
+        self.assertEqual(self.totals(), dict(calculate_shopping_totals()))
+        self.assertEqual(
+            self.totals(),
+            {
+                (self.buyer.id, self.ingredients[index].id): amount
+                for index, amount in expected.items()
+            },
+        )
+
+    def test_recipe_delete_through_api(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.delete(f"/api/recipes/{self.recipe.id}/")
+        self.assertEqual(response.status_code, 204)
+        self.assert_totals_consistent({0: 50, 2: 30})
+
+    def test_recipe_delete(self):
+        self.recipe.delete()
+        self.assert_totals_consistent({0: 50, 2: 30})
+
+    def test_author_delete(self):
+        self.author.delete()
+        self.assert_totals_consistent({0: 50, 2: 30})
+
+    def admin_client(self):
+        client = APIClient()
+        client.force_login(
+            create_user("admin", is_staff=True, is_superuser=True)
+        )
+        return client
+
+    def test_admin_ingredient_edit_and_delete(self):
+        client = self.admin_client()
+        row = IngredientInRecipe.objects.get(
+            recipe=self.recipe, ingredient=self.ingredients[1]
+        )
+        response = client.post(
+            f"/admin/recipes/ingredientinrecipe/{row.id}/change/",
+            {
+                "ingredient": self.ingredients[2].id,
+                "recipe": self.recipe.id,
+                "amount": 5,
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assert_totals_consistent({0: 150, 2: 35})
+
+        response = client.post(
+            f"/admin/recipes/ingredientinrecipe/{row.id}/delete/",
+            {"post": "yes"},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assert_totals_consistent({0: 150, 2: 30})
+
+    def test_admin_recipe_inline_edit(self):
+        client = self.admin_client()
+        rows = list(
+            IngredientInRecipe.objects.filter(recipe=self.recipe).order_by(
+                "id"
+            )
+        )
+        tag = Tag.objects.create(name="Обед", color="#00FF00", slug="lunch")
+        data = {
+            "tags": [tag.id],
+            "author": self.author.id,
+            "name": self.recipe.name,
+            "text": self.recipe.text,
+            "cooking_time": self.recipe.cooking_time,
+            "recipe-TOTAL_FORMS": 3,
+            "recipe-INITIAL_FORMS": 2,
+            "recipe-MIN_NUM_FORMS": 1,
+            "recipe-MAX_NUM_FORMS": 1000,
+            "recipe-0-id": rows[0].id,
+            "recipe-0-recipe": self.recipe.id,
+            "recipe-0-ingredient": rows[0].ingredient_id,
+            "recipe-0-amount": 10,
+            "recipe-1-id": rows[1].id,
+            "recipe-1-recipe": self.recipe.id,
+            "recipe-1-ingredient": rows[1].ingredient_id,
+            "recipe-1-amount": rows[1].amount,
+            "recipe-1-DELETE": "on",
+            "recipe-2-recipe": self.recipe.id,
+            "recipe-2-ingredient": self.ingredients[2].id,
+            "recipe-2-amount": 7,
+        }
+        response = client.post(
+            f"/admin/recipes/recipe/{self.recipe.id}/change/", data
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assert_totals_consistent({0: 60, 2: 37})
@@ -0,0 +1,68 @@
+import base64
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from jobs.registry import FAILURE_HANDLERS
+from recipes.images import pending_image, store_pending_image
+from recipes.models import Recipe
+from recipes.tasks import process_image
+from user.models import User
+
+
+class ProcessImageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        author = User.objects.create_user(
+            username="cook",
+            email="cook@example.com",
+            password="password",
+            first_name="Повар",
+            last_name="Поваров",
+        )
+        self.recipe = Recipe.objects.create(
+            author=author,
+            name="Суп",
+            text="Описание",
+            cooking_time=10,
+            image_status=Recipe.IMAGE_PENDING,
+        )
+        buffer = BytesIO()
+        Image.new("RGB", (40, 30), "red").save(buffer, "PNG")
+        data = base64.b64encode(buffer.getvalue()).decode()
+        self.path = store_pending_image(
+            pending_image(f"data:image/png;base64,{data}")
+        )
+
+    def test_failed_attempt_keeps_pending_file(self):
+        with mock.patch(
+            "recipes.tasks.create_renditions", side_effect=OSError
+        ), self.assertRaises(OSError):
+            process_image(self.recipe.id, self.path)
+        self.assertTrue(default_storage.exists(self.path))
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_PENDING)
+
+        process_image(self.recipe.id, self.path)
+        self.assertFalse(default_storage.exists(self.path))
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+        self.assertTrue(self.recipe.image_card)
+
+    def test_exhausted_job_marks_recipe_failed(self):
+        FAILURE_HANDLERS["recipes.process_image"](
+            recipe_id=self.recipe.id, path=self.path
+        )
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_FAILED)
+        self.assertFalse(default_storage.exists(self.path))
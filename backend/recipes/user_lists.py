@@ -0,0 +1,115 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.shopping_cart import apply_shopping_delta, recipes_amounts
+from user.models import User
+
+
+COUNTERS = {
+    Favorite: "favorites_count",
+    ShoppingCart: "shopping_cart_count",
+}
+
+
+def change_counters(model, recipe_ids, step):
+    """Меняет счётчик рецептов recipe_ids одним UPDATE."""
+    field = COUNTERS[model]
+    recipes = Recipe.objects.filter(id__in=recipe_ids)
+    if step < 0:
+        recipes = recipes.filter(**{f"{field}__gt": 0})
+    recipes.update(**{field: F(field) + step})
+
+
+def recipes_added(model, user_id, recipe_ids):
+    """Обновляет то, что зависит от избранного и корзины: счётчики
+    рецептов и итоги списка покупок. Кеш анонимного списка рецептов
+    от них не зависит и не сбрасывается."""
+    change_counters(model, recipe_ids, 1)
+    if model is ShoppingCart:
+        apply_shopping_delta([user_id], recipes_amounts(recipe_ids))
+
+
+def recipes_removed(model, user_id, recipe_ids):
+    change_counters(model, recipe_ids, -1)
+    if model is ShoppingCart:
+        apply_shopping_delta(
+            [user_id],
+            {
+                key: -value
+                for key, value in recipes_amounts(recipe_ids).items()
+            },
+        )
+
+
+def lock_user(user_id):
+    """Сериализует массовые изменения списков одного пользователя, чтобы
+    параллельные запросы не посчитали одни и те же рецепты дважды."""
+    if connection.features.has_select_for_update:
+        list(
+            User.objects.select_for_update()
+            .filter(id=user_id)
+            .order_by()
+            .values("id")
+        )
+
+
+def add_recipe(model, user_id, recipe_id):
+    """Добавляет рецепт одной вставкой. Повтор отсекает ограничение
+    уникальности, поэтому предварительная проверка не нужна. Возвращает
+    False, если рецепт уже был добавлен."""
+    try:
+        with transaction.atomic():
+            model.objects.create(user_id=user_id, recipe_id=recipe_id)
+            recipes_added(model, user_id, [recipe_id])
+    except IntegrityError:
+        return False
+    return True
+
+
+def remove_recipe(model, user_id, recipe_id):
+    """Убирает рецепт одним DELETE. Возвращает False, если рецепта
+    в списке не было."""
+    with transaction.atomic():
+        deleted, _ = model.objects.filter(
+            user_id=user_id, recipe_id=recipe_id
+        ).delete()
+        if deleted:
+            recipes_removed(model, user_id, [recipe_id])
+    return bool(deleted)
+
+
+def add_recipes(model, user_id, recipe_ids):
+    """Добавляет рецепты в избранное или корзину пользователя одной
+    вставкой. Уже добавленные рецепты пропускаются. Возвращает множество
+    id добавленных рецептов."""
+    recipe_ids = set(recipe_ids)
+    with transaction.atomic():
+        lock_user(user_id)
+        added = recipe_ids - set(
+            model.objects.filter(
+                user_id=user_id, recipe_id__in=recipe_ids
+            ).values_list("recipe_id", flat=True)
+        )
+        if added:
+            model.objects.bulk_create(
+                [model(user_id=user_id, recipe_id=pk) for pk in added],
+                ignore_conflicts=True,
+            )
+            recipes_added(model, user_id, added)
+    return added
+
+
+def remove_recipes(model, user_id, recipe_ids):
+    """Убирает рецепты из избранного или корзины одним DELETE.
+    Возвращает множество id убранных рецептов."""
+    with transaction.atomic():
+        lock_user(user_id)
+        entries = model.objects.filter(
+            user_id=user_id, recipe_id__in=set(recipe_ids)
+        )
+        removed = set(entries.values_list("recipe_id", flat=True))
+        if removed:
+            entries.delete()
+            recipes_removed(model, user_id, removed)
+    return removed
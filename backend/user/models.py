@@ -37,6 +37,11 @@ class User(AbstractUser):
         max_length=150,
         blank=False,
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name="Количество рецептов",
+        default=0,
+        editable=False,
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = [